@@ -11,6 +11,7 @@
 # 1.1 Standard Library Imports
 import os
 import logging # For robust logging across modules.
+import importlib # For importing feature modules on demand.
 
 # 1.2 Third-Party Library Imports
 try:
@@ -22,11 +23,23 @@ except ImportError as e:
     st.error("A critical library is missing. Please install it using pip. Error: " + str(e))
     st.stop() # Halt execution if core dependencies are not met.
 
-# Load environment variables from .env file at the very start.
-load_dotenv()
-
-# Configure basic logging. This helps in debugging issues across different modules.
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# One-time process bootstrap. Streamlit re-executes this script on every interaction, so the
+# .env parse and logging setup are cached to run once per server process, not once per rerun.
+@st.cache_resource(show_spinner=False)
+def bootstrap_environment() -> bool:
+    """
+    Loads environment variables from the .env file and configures basic logging.
+
+    Returns:
+        bool: Always True; the return value only exists so the call can be cached.
+    """
+    # Load environment variables from .env file.
+    load_dotenv()
+    # Configure basic logging. This helps in debugging issues across different modules.
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return True
+
+bootstrap_environment()
 logger = logging.getLogger(__name__)
 
 # ====================================================================================================
@@ -75,42 +88,61 @@ COLOR_ERROR_TEXT = "#E74C3C" # Red for error messages
 # This design pattern allows for easy expansion of the suite.
 # ====================================================================================================
 
-# Import individual modules from the 'modules' directory.
-# Each module is expected to have a 'run()' function that encapsulates its Streamlit UI and logic.
+# Import shared utilities eagerly; they are needed by the global sidebar on every rerun.
 try:
-    from modules import (
-        shared_utils,
-        prompt_generator,
-        prompt_chat_studio,
-        prompt_library,
-        prompt_types_toolkit,
-        prompt_evaluator,
-        prompt_formatter,
-        prompt_builder,
-        multilingual_assistant,
-        secure_vault,
-        analytics_reports
-    )
+    from modules import shared_utils
+    from modules import _ratelimit
+    from modules import _llm_cache
 except ImportError as e:
-    logger.critical(f"Failed to import a module: {e}. Ensure all module files exist and are correctly named.")
-    st.error(f"Failed to load application modules. Please check the 'modules/' directory. Error: " + str(e))
+    logger.critical(f"Failed to import shared utilities: {e}. Ensure 'modules/shared_utils.py' exists.")
+    st.error("Failed to load application modules. Please check the 'modules/' directory. Error: " + str(e))
     st.stop()
 
-# Dictionary to map module names to their respective run functions.
-# This makes it easy to dispatch to the correct module based on sidebar selection.
+# Dictionary to map module names to the dotted import path of their implementation.
+# Each module is expected to have a 'run()' function that encapsulates its Streamlit UI and logic.
+# Modules are imported lazily on first selection, so heavy dependencies (e.g. pandas/altair in
+# Analytics & Reports) are only loaded when the user actually visits that page.
 MODULES = {
-    "Prompt Generator": prompt_generator,
-    "Prompt Chat Studio": prompt_chat_studio,
-    "Prompt Library": prompt_library,
-    "Prompt Types Toolkit": prompt_types_toolkit,
-    "AI Prompt Evaluator": prompt_evaluator,
-    "Prompt Formatter": prompt_formatter,
-    "Prompt Builder (No-Code)": prompt_builder,
-    "Multilingual Prompt Assistant": multilingual_assistant,
-    "Secure Prompt Vault": secure_vault,
-    "Analytics & Reports": analytics_reports,
+    "Prompt Generator": "modules.prompt_generator",
+    "Prompt Chat Studio": "modules.prompt_chat_studio",
+    "Prompt Library": "modules.prompt_library",
+    "Prompt Types Toolkit": "modules.prompt_types_toolkit",
+    "AI Prompt Evaluator": "modules.prompt_evaluator",
+    "Prompt Formatter": "modules.prompt_formatter",
+    "Prompt Builder (No-Code)": "modules.prompt_builder",
+    "Multilingual Prompt Assistant": "modules.multilingual_assistant",
+    "Secure Prompt Vault": "modules.secure_vault",
+    "Analytics & Reports": "modules.analytics_reports",
 }
 
+# Precomputed navigation options and their positions, used by the sidebar radio.
+MODULE_NAMES = tuple(MODULES.keys())
+MODULE_INDEX = {name: i for i, name in enumerate(MODULE_NAMES)}
+
+@st.cache_resource(show_spinner=False)
+def get_module_run(module_name: str):
+    """
+    Imports the module registered under `module_name` on first use and resolves its
+    'run()' entry point. Cached across reruns, so the import and the reflection checks
+    only happen once per module.
+
+    Args:
+        module_name (str): The display name of the module (a key of MODULES).
+
+    Returns:
+        callable: The module's 'run' function.
+
+    Raises:
+        ImportError: If the module cannot be imported.
+        AttributeError: If the module does not define a callable 'run'.
+    """
+    logger.info(f"Lazily importing module '{module_name}' ({MODULES[module_name]}).")
+    module_obj = importlib.import_module(MODULES[module_name])
+    run_fn = getattr(module_obj, "run", None)
+    if not callable(run_fn):
+        raise AttributeError(f"Module '{module_name}' is missing a callable 'run' function.")
+    return run_fn
+
 # ====================================================================================================
 # SECTION 4: STREAMLIT PAGE CONFIGURATION AND GLOBAL UI ELEMENTS
 # Sets up the overall layout, title, and persistent UI components like the sidebar API key input.
@@ -141,22 +173,75 @@ with st.sidebar:
              "You can also set it as an environment variable `GEMINI_API_KEY` or in a `.env` file."
     )
 
+    # Strip once per rerun and reuse the result for both the state sync and the status display.
+    has_api_key = bool(current_api_key_input.strip())
+
     # Update session state if the API key input changes.
     if current_api_key_input != st.session_state["gemini_api_key"]:
-        st.session_state["gemini_api_key"] = current_api_key_input
         # When API key changes, force a re-evaluation of model initialization status.
-        shared_utils.clear_cached_model() # Clear cached model if key changes.
-        st.session_state["api_key_entered"] = bool(current_api_key_input.strip())
+        shared_utils.clear_cached_model(st.session_state["gemini_api_key"]) # Evict only the old key's models.
+        st.session_state["gemini_api_key"] = current_api_key_input
         logger.info("Gemini API Key updated in session state.")
 
+    # Only write the status flag when it actually changes.
+    if st.session_state["api_key_entered"] != has_api_key:
+        st.session_state["api_key_entered"] = has_api_key
 
     # Display API key status
-    if st.session_state["gemini_api_key"].strip():
+    if has_api_key:
         st.success("API Key Loaded!")
-        st.session_state["api_key_entered"] = True
     else:
         st.warning("Please enter your Gemini API Key to unlock all features.")
-        st.session_state["api_key_entered"] = False
+
+    # Client-side pacing of Gemini calls, to stay under the API key's quota. Limits apply to
+    # this session's API key only; other keys (other users) have their own buckets.
+    with st.expander("🚦 Rate Limits", expanded=False):
+        requests_per_minute = st.number_input(
+            "Requests per minute", min_value=1, max_value=10_000, value=60, step=1, key="rate_limit_rpm",
+            help="Maximum Gemini API requests per minute with this API key, across all modules."
+        )
+        tokens_per_minute = st.number_input(
+            "Tokens per minute", min_value=1_000, max_value=10_000_000, value=1_000_000, step=10_000,
+            key="rate_limit_tpm", help="Maximum estimated prompt tokens per minute with this API key, across all modules."
+        )
+        if has_api_key:
+            _ratelimit.configure_limits(shared_utils.get_api_key_digest(), requests_per_minute, tokens_per_minute)
+
+    # Response cache settings shared by the AI-powered modules.
+    with st.expander("⚡ Response Cache", expanded=False):
+        st.radio(
+            "LLM cache policy",
+            _llm_cache.CACHE_POLICIES,
+            index=0,
+            key="llm_cache_policy",
+            help="Enabled: reuse and save responses. Read-only: reuse but never save. "
+                 "Write-only: always call Gemini and save. Replay: only serve cached responses, "
+                 "never call Gemini (handy for UI demos). Disabled: bypass the cache."
+        )
+        st.caption(
+            "Cached responses are shared by everyone using this app instance: an identical request "
+            "from another session is answered with the same cached output. Choose Disabled or "
+            "Write-only for private work. Responses are only written to disk when "
+            "PROMPTGPT_LLM_CACHE_PATH is set, and expire after 7 days."
+        )
+        semantic_enabled = st.checkbox(
+            "Reuse results for near-duplicate tasks",
+            value=False,
+            key="semantic_cache_enabled", # Matches _semantic_cache.SEMANTIC_CACHE_ENABLED_KEY.
+            help="Off by default. When on, the Prompt Generator may answer a reworded task with the "
+                 "prompt generated earlier (with your API key) for a similar but different task."
+        )
+        st.slider(
+            "Semantic cache similarity threshold",
+            disabled=not semantic_enabled,
+            min_value=0.80,
+            max_value=1.00,
+            value=0.92, # Matches _semantic_cache.SEMANTIC_CACHE_DEFAULT_THRESHOLD.
+            step=0.01,
+            key="semantic_cache_threshold",
+            help="Near-duplicate tasks whose embedding similarity meets this threshold reuse an "
+                 "earlier generated prompt. Set to 1.00 to effectively disable near-duplicate reuse."
+        )
 
     st.markdown("---")
     st.subheader("🌐 Navigation")
@@ -165,16 +250,20 @@ with st.sidebar:
     # This acts as the primary navigation for the multi-page application.
     selected_module = st.radio(
         "Go to Module:",
-        list(MODULES.keys()),
-        index=list(MODULES.keys()).index(st.session_state["current_module"]),
+        MODULE_NAMES,
+        index=MODULE_INDEX.get(st.session_state["current_module"], 0),
         key="main_module_navigation",
         help="Select a module from the PromptGPT Suite."
     )
 
     # Update current_module in session state if navigation changes.
+    # The radio widget already triggered this rerun, and the dispatcher below reads the
+    # updated value, so no explicit rerun is needed to switch modules. Modules that navigate
+    # programmatically (e.g. the Prompt Library's "Use This Prompt") must do so from an
+    # on_click callback that sets both "current_module" and "main_module_navigation";
+    # otherwise this radio writes its own value back on the next run.
     if selected_module != st.session_state["current_module"]:
         st.session_state["current_module"] = selected_module
-        st.experimental_rerun() # Rerun to switch to the selected module's content.
 
     st.markdown("---")
     st.markdown(
@@ -197,20 +286,37 @@ st.title(APP_TITLE)
 st.markdown(APP_DESCRIPTION)
 st.markdown("---")
 
-# Retrieve the module object based on the selected module name.
-current_module_obj = MODULES[st.session_state["current_module"]]
+# Resolve the selected module's 'run' function, importing the module on first use.
+try:
+    current_module_run = get_module_run(st.session_state["current_module"])
+except ImportError as e:
+    logger.critical(f"Failed to import module '{st.session_state['current_module']}': {e}", exc_info=True)
+    st.error(f"Failed to load the **{st.session_state['current_module']}** module. Please check the 'modules/' directory. Error: " + str(e))
+    st.stop()
+except AttributeError:
+    st.error(f"Module '{st.session_state['current_module']}' is not correctly configured (missing 'run' function).")
+    logger.error(f"Module '{st.session_state['current_module']}' missing 'run' function.")
+    st.stop()
 
-# Check if the module has a 'run' function and execute it.
-if hasattr(current_module_obj, "run") and callable(current_module_obj.run):
+# Modules run inside a fragment: interactions with a module's own widgets rerun only the
+# module body, skipping the sidebar and global styling. Modules read the API key status from
+# session state (see shared_utils.is_api_key_valid), so fragment reruns always see current state.
+@st.fragment
+def render_current_module(module_name: str, module_run):
+    """
+    Runs the selected module's UI, reporting any unexpected error inline.
+
+    Args:
+        module_name (str): The display name of the module being rendered.
+        module_run (callable): The module's 'run' function.
+    """
     try:
-        # Pass the global API key status to the module.
-        current_module_obj.run(api_key_valid=st.session_state["api_key_entered"])
+        module_run()
     except Exception as e:
-        logger.error(f"Error running module '{st.session_state['current_module']}': {e}", exc_info=True)
-        st.error(f"An error occurred in the **{st.session_state['current_module']}** module. Please try again later. (Error: {e})")
-else:
-    st.error(f"Module '{st.session_state['current_module']}' is not correctly configured (missing 'run' function).")
-    logger.error(f"Module '{st.session_state['current_module']}' missing 'run' function.")
+        logger.error(f"Error running module '{module_name}': {e}", exc_info=True)
+        st.error(f"An error occurred in the **{module_name}** module. Please try again later. (Error: {e})")
+
+render_current_module(st.session_state["current_module"], current_module_run)
 
 # ====================================================================================================
 # SECTION 6: GLOBAL STYLING
@@ -218,8 +324,17 @@ else:
 # This CSS applies globally to all pages/modules.
 # ====================================================================================================
 
-st.markdown(
-    f"""
+# The stylesheet only depends on the module-level COLOR_* constants, so it is built once
+# and cached across reruns instead of re-formatting the f-string on every interaction.
+@st.cache_resource
+def get_global_css() -> str:
+    """
+    Builds the global <style> block for the application.
+
+    Returns:
+        str: The formatted HTML <style> block.
+    """
+    return f"""
     <style>
     /* Import Google Font - Inter for a clean, modern look */
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
@@ -509,8 +624,8 @@ st.markdown(
 
 
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+st.markdown(get_global_css(), unsafe_allow_html=True)
 
 logger.info("PromptGPT Suite 'app.py' loaded successfully.")
@@ -0,0 +1,3 @@
+# modules/__init__.py
+# Package for the individual PromptGPT Suite feature modules.
+# app.py imports each module on first use through the dotted paths in its MODULES registry.
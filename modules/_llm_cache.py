@@ -0,0 +1,276 @@
+# modules/_llm_cache.py
+# Exact-match response cache for Gemini calls made by the feature modules.
+# Responses are kept in a bounded in-memory LRU and, when PROMPTGPT_LLM_CACHE_PATH is set,
+# persisted to a SQLite file with a row cap and a TTL, so re-submitting an identical request
+# is served without another API call. The cache is shared by every session in the process.
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================
+# SECTION 1: CACHE CONFIGURATION
+# Storage location and size limits for the response cache.
+# ====================================================================================================
+
+# 1.1 SQLite file holding persisted responses. Disk persistence is opt-in: cached responses
+# contain users' tasks and outputs, so nothing is written unless PROMPTGPT_LLM_CACHE_PATH names
+# a file (preferably outside the source checkout). Unset, the cache lives in memory only.
+LLM_CACHE_PATH = os.environ.get("PROMPTGPT_LLM_CACHE_PATH") or None
+
+# 1.1.1 Retention of persisted responses: rows older than the TTL are ignored and pruned, and
+# only the newest LLM_CACHE_MAX_ROWS rows are kept. Pruning runs on open and every
+# LLM_CACHE_PRUNE_INTERVAL inserts.
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+LLM_CACHE_MAX_ROWS = 5000
+LLM_CACHE_PRUNE_INTERVAL = 100
+
+# 1.2 Number of responses kept in process memory in front of SQLite.
+LLM_CACHE_MEMORY_SIZE = 256
+
+# 1.3 Cache policies (selected in the sidebar)
+# Enabled: read and write. Read-only: never write. Write-only: never read (always call the API).
+# Replay: read only and raise CacheMiss instead of calling the API. Disabled: bypass the cache.
+POLICY_ENABLED = "Enabled"
+POLICY_READ_ONLY = "Read-only"
+POLICY_WRITE_ONLY = "Write-only"
+POLICY_REPLAY = "Replay"
+POLICY_DISABLED = "Disabled"
+CACHE_POLICIES = (POLICY_ENABLED, POLICY_READ_ONLY, POLICY_WRITE_ONLY, POLICY_REPLAY, POLICY_DISABLED)
+READ_POLICIES = frozenset((POLICY_ENABLED, POLICY_READ_ONLY, POLICY_REPLAY))
+WRITE_POLICIES = frozenset((POLICY_ENABLED, POLICY_WRITE_ONLY))
+
+_CREATE_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS llm_responses ("
+    "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+)
+_CREATE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS llm_responses_created_at ON llm_responses (created_at)"
+_PRUNE_EXPIRED_SQL = "DELETE FROM llm_responses WHERE created_at < ?"
+_PRUNE_OVERFLOW_SQL = (
+    "DELETE FROM llm_responses WHERE key IN ("
+    "SELECT key FROM llm_responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)"
+)
+
+# Module-level state is shared by every session served by this process.
+_lock = threading.Lock()
+_memory_cache = OrderedDict()
+_connection = None
+_disk_unavailable = False
+_inserts_since_prune = 0
+
+# In-flight requests by cache key: {"event": threading.Event, "result": str or None}.
+_inflight_lock = threading.Lock()
+_inflight = {}
+
+# 1.4 How long a duplicate request waits for the in-flight one before calling the API itself.
+SINGLE_FLIGHT_TIMEOUT_SECONDS = 60
+
+class CacheMiss(Exception):
+    """
+    Raised under the Replay policy when a request has no cached response, instead of calling the API.
+    """
+
+# ====================================================================================================
+# SECTION 2: CACHE KEYS AND STORAGE
+# Helpers for computing cache keys and reading/writing cached responses.
+# ====================================================================================================
+
+# 2.1 Cache key derivation
+def make_cache_key(payload: str, model_name: str, generation_config: dict = None) -> str:
+    """
+    Computes the cache key for a single generate_content request.
+
+    Tone, format, word limit and complexity are already rendered into the payload,
+    so the payload plus the model name and sampling settings identify the request.
+
+    Args:
+        payload (str): The full prompt sent to the model.
+        model_name (str): The Gemini model the request is sent to.
+        generation_config (dict, optional): The generation config used for the call.
+
+    Returns:
+        str: A SHA-256 hex digest identifying the request.
+    """
+    config = generation_config or {}
+    key_source = "||".join((
+        payload,
+        model_name,
+        str(config.get("temperature")),
+        str(config.get("max_output_tokens")),
+    ))
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+def _get_connection():
+    """
+    Opens the SQLite connection on first use. Returns None if the cache file cannot be
+    opened, in which case the cache keeps working in memory only. Caller holds `_lock`.
+    """
+    global _connection, _disk_unavailable
+    if _connection is None and not _disk_unavailable:
+        if LLM_CACHE_PATH is None:
+            _disk_unavailable = True
+            logger.info("LLM response cache is memory-only (PROMPTGPT_LLM_CACHE_PATH not set).")
+            return None
+        try:
+            connection = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_CREATE_TABLE_SQL)
+            connection.execute(_CREATE_INDEX_SQL)
+            _prune(connection)
+            connection.commit()
+            _connection = connection
+            logger.info("LLM response cache opened at %s.", LLM_CACHE_PATH)
+        except sqlite3.Error as e:
+            _disk_unavailable = True
+            logger.warning("LLM response cache falling back to memory only: %s", e)
+    return _connection
+
+def _prune(connection):
+    """
+    Deletes expired rows and the oldest rows beyond LLM_CACHE_MAX_ROWS. Caller holds `_lock`
+    and commits.
+    """
+    connection.execute(_PRUNE_EXPIRED_SQL, (time.time() - LLM_CACHE_TTL_SECONDS,))
+    connection.execute(_PRUNE_OVERFLOW_SQL, (LLM_CACHE_MAX_ROWS,))
+
+def _remember(key: str, response_text: str):
+    """
+    Stores a response in the in-memory LRU, evicting the oldest entry when full.
+    Caller holds `_lock`.
+    """
+    _memory_cache[key] = response_text
+    _memory_cache.move_to_end(key)
+    if len(_memory_cache) > LLM_CACHE_MEMORY_SIZE:
+        _memory_cache.popitem(last=False)
+
+# 2.2 Cache lookup
+def get_cached_response(key: str, policy: str = POLICY_ENABLED):
+    """
+    Looks up a cached response, checking memory first and then SQLite.
+
+    Args:
+        key (str): A key returned by `make_cache_key`.
+        policy (str): The active cache policy; policies without reads always miss.
+
+    Returns:
+        str: The cached response text, or None on a cache miss.
+    """
+    if policy not in READ_POLICIES:
+        return None
+    with _lock:
+        response_text = _memory_cache.get(key)
+        if response_text is not None:
+            _memory_cache.move_to_end(key)
+            return response_text
+
+        connection = _get_connection()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT response FROM llm_responses WHERE key = ? AND created_at >= ?",
+                (key, time.time() - LLM_CACHE_TTL_SECONDS)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("LLM response cache read failed: %s", e)
+            return None
+        if row is None:
+            return None
+        _remember(key, row[0])
+        return row[0]
+
+# 2.3 Cache insert
+def store_response(key: str, response_text: str, policy: str = POLICY_ENABLED):
+    """
+    Saves a response in memory and, if disk persistence is enabled, in SQLite.
+
+    Args:
+        key (str): A key returned by `make_cache_key`.
+        response_text (str): The model response to cache. Empty responses are not stored.
+        policy (str): The active cache policy; policies without writes store nothing.
+    """
+    global _inserts_since_prune
+    if not response_text or policy not in WRITE_POLICIES:
+        return
+    with _lock:
+        _remember(key, response_text)
+        connection = _get_connection()
+        if connection is None:
+            return
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response_text, time.time())
+            )
+            _inserts_since_prune += 1
+            if _inserts_since_prune >= LLM_CACHE_PRUNE_INTERVAL:
+                _prune(connection)
+                _inserts_since_prune = 0
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.warning("LLM response cache write failed: %s", e)
+
+# 2.4 Replay guard
+def ensure_live_call_allowed(policy: str):
+    """
+    Called after a cache miss, right before a live API call.
+
+    Args:
+        policy (str): The active cache policy.
+
+    Raises:
+        CacheMiss: Under the Replay policy, which never calls the API.
+    """
+    if policy == POLICY_REPLAY:
+        raise CacheMiss("No cached response for this request (Replay cache policy).")
+
+# 2.5 Single-flight de-duplication
+def run_single_flight(key: str, call, policy: str, api_key_digest: bytes,
+                      timeout: float = SINGLE_FLIGHT_TIMEOUT_SECONDS) -> str:
+    """
+    Runs `call()` for `key`, unless an identical request from the same API key is already in
+    flight (a double-click or a second browser tab), in which case it waits for that request's
+    result instead. Sharing an in-flight result is a cache read, so it only happens under the
+    policies in READ_POLICIES; otherwise `call()` is always made.
+
+    Args:
+        key (str): A key returned by `make_cache_key`.
+        call (callable): Performs the API request and returns the response text.
+        policy (str): The active cache policy.
+        api_key_digest (bytes): Digest of the caller's API key, so results are never shared
+            across keys (or answered on another user's quota).
+        timeout (float): Seconds to wait for the in-flight request. If it times out or
+            produces no text, `call()` is made after all.
+
+    Returns:
+        str: The response text.
+    """
+    if policy not in READ_POLICIES:
+        return call()
+    key = api_key_digest.hex() + ":" + key
+
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _inflight[key] = {"event": threading.Event(), "result": None}
+
+    if not is_leader:
+        if flight["event"].wait(timeout) and flight["result"]:
+            logger.info("Identical request already in flight; reused its response.")
+            return flight["result"]
+        return call()
+
+    try:
+        flight["result"] = call()
+        return flight["result"]
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight["event"].set()
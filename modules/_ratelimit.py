@@ -0,0 +1,118 @@
+# modules/_ratelimit.py
+# Client-side token-bucket rate limiting for Gemini API calls.
+# Requests are paced to stay under the provider's requests-per-minute (RPM) and
+# tokens-per-minute (TPM) limits, so bursts of clicks wait briefly instead of
+# triggering 429 errors and the provider's backoff.
+
+import time
+import logging
+import threading
+import contextlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================
+# SECTION 1: RATE LIMIT CONFIGURATION
+# Default limits; each bucket's limits can be changed at runtime from the sidebar via `configure_limits`.
+# ====================================================================================================
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+
+# 1.1 Number of per-key buckets kept; the least recently used bucket is dropped beyond this.
+MAX_BUCKETS = 256
+
+# One bucket per API key, since each key has its own quota: bucket key (a digest of the API key,
+# see `shared_utils.get_api_key_digest`) -> {"rpm", "tpm", "request_tokens", "token_tokens", "last_update"}.
+# Module-level state is shared by every session served by this process; sessions using the same
+# key share (and configure) the same bucket.
+_lock = threading.Lock()
+_buckets = OrderedDict()
+
+# ====================================================================================================
+# SECTION 2: TOKEN BUCKET
+# Refill, wait and consume logic guarding each API call.
+# ====================================================================================================
+
+def _get_bucket(bucket_key) -> dict:
+    """
+    Returns the bucket for `bucket_key`, creating a full one with the default limits on first
+    use and evicting the least recently used bucket when there are too many. Caller holds `_lock`.
+    """
+    bucket = _buckets.get(bucket_key)
+    if bucket is None:
+        bucket = _buckets[bucket_key] = {
+            "rpm": DEFAULT_REQUESTS_PER_MINUTE,
+            "tpm": DEFAULT_TOKENS_PER_MINUTE,
+            "request_tokens": float(DEFAULT_REQUESTS_PER_MINUTE),
+            "token_tokens": float(DEFAULT_TOKENS_PER_MINUTE),
+            "last_update": time.monotonic(),
+        }
+        if len(_buckets) > MAX_BUCKETS:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(bucket_key)
+    return bucket
+
+# 2.1 Runtime configuration
+def configure_limits(bucket_key, requests_per_minute: int, tokens_per_minute: int):
+    """
+    Updates one bucket's capacities. Current levels are clamped to the new capacities.
+
+    Args:
+        bucket_key: Identifies the API key whose limits are set (see `shared_utils.get_api_key_digest`).
+        requests_per_minute (int): Maximum API requests per minute.
+        tokens_per_minute (int): Maximum estimated tokens per minute.
+    """
+    requests_per_minute = max(1, int(requests_per_minute))
+    tokens_per_minute = max(1, int(tokens_per_minute))
+    with _lock:
+        bucket = _get_bucket(bucket_key)
+        if (requests_per_minute, tokens_per_minute) == (bucket["rpm"], bucket["tpm"]):
+            return
+        bucket["rpm"] = requests_per_minute
+        bucket["tpm"] = tokens_per_minute
+        bucket["request_tokens"] = min(bucket["request_tokens"], requests_per_minute)
+        bucket["token_tokens"] = min(bucket["token_tokens"], tokens_per_minute)
+    logger.info("Gemini rate limits set to %d RPM / %d TPM for one API key.", requests_per_minute, tokens_per_minute)
+
+def _refill(bucket: dict, now: float):
+    """
+    Adds the tokens earned since the bucket's last update. Caller holds `_lock`.
+    """
+    elapsed = now - bucket["last_update"]
+    bucket["request_tokens"] = min(bucket["rpm"], bucket["request_tokens"] + elapsed * bucket["rpm"] / 60)
+    bucket["token_tokens"] = min(bucket["tpm"], bucket["token_tokens"] + elapsed * bucket["tpm"] / 60)
+    bucket["last_update"] = now
+
+# 2.2 Acquire a request slot
+@contextlib.contextmanager
+def acquire(bucket_key, estimated_tokens: int = 0):
+    """
+    Blocks until one request and `estimated_tokens` tokens are available in the bucket of
+    `bucket_key`, then consumes them.
+    Use as `with acquire(bucket_key, len(payload) // 4): model.generate_content(payload)`.
+
+    Args:
+        bucket_key: Identifies the API key the call is made with (see `shared_utils.get_api_key_digest`).
+            Read it on the script thread; worker threads have no session state.
+        estimated_tokens (int): Estimated token count of the request. Values above the
+            per-minute capacity are clamped, so an oversized request waits for a full bucket
+            instead of blocking forever.
+    """
+    while True:
+        with _lock:
+            bucket = _get_bucket(bucket_key)
+            _refill(bucket, time.monotonic())
+            needed_tokens = min(estimated_tokens, bucket["tpm"])
+            request_wait = max(0.0, (1 - bucket["request_tokens"]) * 60 / bucket["rpm"])
+            token_wait = max(0.0, (needed_tokens - bucket["token_tokens"]) * 60 / bucket["tpm"])
+            wait_seconds = max(request_wait, token_wait)
+            if wait_seconds <= 0:
+                bucket["request_tokens"] -= 1
+                bucket["token_tokens"] -= needed_tokens
+                break
+        logger.info("Rate limit reached; waiting %.2fs before the next Gemini call.", wait_seconds)
+        time.sleep(wait_seconds)
+    yield
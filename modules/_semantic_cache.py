@@ -0,0 +1,153 @@
+# modules/_semantic_cache.py
+# Semantic (embedding-similarity) cache for prompt generation requests.
+# Near-duplicate tasks, e.g. small rewordings of the same goal, are answered with a
+# previously generated response when their embeddings are similar enough.
+# Off by default: a hit returns the output of a *different* task, so it is only used when
+# the user opts in from the sidebar, and entries are only shared by callers with the same API key.
+
+import hashlib
+import logging
+import threading
+import functools
+from collections import OrderedDict
+
+import google.generativeai as genai
+from modules import _ratelimit # Token-bucket pacing for Gemini calls
+
+logger = logging.getLogger(__name__)
+
+# ====================================================================================================
+# SECTION 1: CACHE CONFIGURATION
+# Embedding model, similarity threshold and size limits for the semantic cache.
+# ====================================================================================================
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# Session-state key of the sidebar opt-in checkbox.
+SEMANTIC_CACHE_ENABLED_KEY = "semantic_cache_enabled"
+
+# 1.1 Default cosine-similarity threshold for a cache hit (adjustable in the sidebar).
+SEMANTIC_CACHE_DEFAULT_THRESHOLD = 0.92
+
+# 1.2 Size limits: entries kept per namespace, and namespaces kept overall.
+SEMANTIC_CACHE_MAX_ENTRIES = 1000
+SEMANTIC_CACHE_MAX_NAMESPACES = 64
+
+# numpy is imported inside the functions that use it, so importing this module (from the
+# landing page) does not load it before the semantic cache is actually enabled.
+# Namespace -> {"vectors": (N, D) array of unit vectors, "responses": list of N strings}.
+# Module-level state is shared by every session served by this process.
+_lock = threading.Lock()
+_indexes = OrderedDict()
+
+# ====================================================================================================
+# SECTION 2: EMBEDDINGS AND LOOKUP
+# Helpers for embedding text and matching it against previously cached requests.
+# ====================================================================================================
+
+# 2.1 Namespace derivation
+def make_namespace(*parts) -> str:
+    """
+    Derives the namespace a request's cache entries live in. Only requests whose
+    namespace parts match exactly (API key digest, meta-prompt prefix, model, tone,
+    format, ...) are compared by similarity, so changing any of them never serves a
+    stale hit and one user's outputs are never served to another.
+
+    Returns:
+        str: A SHA-256 hex digest of the given parts.
+    """
+    return hashlib.sha256("||".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+def _normalize(text: str) -> str:
+    """
+    Collapses runs of whitespace and trims the ends, so edits that only touch spacing or
+    line breaks reuse the cached embedding instead of issuing another embedding call.
+    """
+    return " ".join(text.split())
+
+@functools.lru_cache(maxsize=512)
+def _embed(text: str, api_key_digest: bytes):
+    """
+    Embeds `text` with the Gemini embedding model and returns a read-only unit vector
+    (a numpy array). Cached, so re-submitting the same text does not repeat the embedding call.
+    `api_key_digest` selects the caller's rate-limit bucket.
+    """
+    import numpy as np
+    with _ratelimit.acquire(api_key_digest, estimated_tokens=len(text) // 4):
+        result = genai.embed_content(model=EMBEDDING_MODEL, content=text)
+    vector = np.asarray(result["embedding"], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.setflags(write=False)
+    return vector
+
+# 2.2 Similarity lookup
+def lookup(namespace: str, text: str, api_key_digest: bytes, threshold: float = SEMANTIC_CACHE_DEFAULT_THRESHOLD):
+    """
+    Returns the cached response for the most similar earlier request in `namespace`.
+
+    Args:
+        namespace (str): A namespace returned by `make_namespace`.
+        text (str): The user-supplied text to compare (e.g. the task description).
+        api_key_digest (bytes): Digest of the caller's API key, for rate limiting the embedding call.
+        threshold (float): Minimum cosine similarity required for a hit.
+
+    Returns:
+        str: The cached response, or None if nothing is similar enough or embedding fails.
+    """
+    with _lock:
+        if namespace not in _indexes:
+            return None
+    try:
+        query = _embed(_normalize(text), api_key_digest)
+    except Exception as e:
+        logger.warning("Semantic cache lookup skipped, embedding failed: %s", e)
+        return None
+
+    with _lock:
+        index = _indexes.get(namespace)
+        if index is None:
+            return None
+        similarities = index["vectors"] @ query
+        best = int(similarities.argmax())
+        similarity = float(similarities[best])
+        response_text = index["responses"][best]
+
+    # Logged on both paths so bad hits can be traced back to the threshold in use.
+    if similarity >= threshold:
+        logger.info("Semantic cache hit (similarity=%.4f, threshold=%.2f).", similarity, threshold)
+        return response_text
+    logger.debug("Semantic cache miss (best similarity=%.4f, threshold=%.2f).", similarity, threshold)
+    return None
+
+# 2.3 Cache insert
+def store(namespace: str, text: str, response_text: str, api_key_digest: bytes):
+    """
+    Adds a generated response to the semantic cache, evicting the oldest entries when full.
+
+    Args:
+        namespace (str): A namespace returned by `make_namespace`.
+        text (str): The user-supplied text the response was generated for.
+        response_text (str): The model response to cache. Empty responses are not stored.
+        api_key_digest (bytes): Digest of the caller's API key, for rate limiting the embedding call.
+    """
+    if not response_text:
+        return
+    import numpy as np
+    try:
+        vector = _embed(_normalize(text), api_key_digest)
+    except Exception as e:
+        logger.warning("Semantic cache store skipped, embedding failed: %s", e)
+        return
+
+    with _lock:
+        index = _indexes.get(namespace)
+        if index is None:
+            _indexes[namespace] = {"vectors": vector[np.newaxis, :].copy(), "responses": [response_text]}
+            if len(_indexes) > SEMANTIC_CACHE_MAX_NAMESPACES:
+                _indexes.popitem(last=False)
+            return
+        _indexes.move_to_end(namespace)
+        index["vectors"] = np.vstack((index["vectors"][-(SEMANTIC_CACHE_MAX_ENTRIES - 1):], vector))
+        index["responses"] = index["responses"][-(SEMANTIC_CACHE_MAX_ENTRIES - 1):] + [response_text]
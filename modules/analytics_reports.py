@@ -4,11 +4,14 @@
 
 import streamlit as st
 import logging
-import pandas as pd
-import numpy as np
-import altair as alt # For conceptual data visualization
+from typing import TYPE_CHECKING
 from modules import shared_utils # Import shared utility functions
 
+# pandas and altair are imported inside the functions that need them, so loading this
+# module (and the app's cold start) does not pay their import cost.
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 # ====================================================================================================
@@ -34,36 +37,60 @@ Optimize your prompt engineering workflow with data-driven decisions!
 
 # Conceptual Data for Simulation
 # In a real app, this would come from a backend database tracking user interactions.
+# Columns are immutable tuples of plain Python values; dates are kept as ISO strings and
+# only parsed when the DataFrame is built, so importing this module never touches pandas.
 CONCEPTUAL_USAGE_DATA = {
-    "date": pd.to_datetime(["2024-01-01", "2024-01-08", "2024-01-15", "2024-01-22", "2024-01-29",
-                            "2024-02-05", "2024-02-12", "2024-02-19", "2024-02-26", "2024-03-04"]),
-    "prompts_generated": [50, 65, 70, 85, 90, 75, 100, 110, 95, 120],
-    "prompts_saved": [10, 15, 12, 18, 20, 15, 25, 28, 22, 30],
-    "chat_interactions": [20, 25, 30, 35, 40, 30, 45, 50, 40, 55],
+    "date": ("2024-01-01", "2024-01-08", "2024-01-15", "2024-01-22", "2024-01-29",
+             "2024-02-05", "2024-02-12", "2024-02-19", "2024-02-26", "2024-03-04"),
+    "prompts_generated": (50, 65, 70, 85, 90, 75, 100, 110, 95, 120),
+    "prompts_saved": (10, 15, 12, 18, 20, 15, 25, 28, 22, 30),
+    "chat_interactions": (20, 25, 30, 35, 40, 30, 45, 50, 40, 55),
 }
-CONCEPTUAL_USAGE_DF = pd.DataFrame(CONCEPTUAL_USAGE_DATA)
 
 CONCEPTUAL_PROMPT_PERFORMANCE = {
-    "Prompt Name": ["Creative Story Starter", "Email for Client Update", "Python Function", "Social Media Post", "Debate Argument"],
-    "Generations": [250, 300, 180, 400, 120],
-    "Saves": [50, 70, 30, 90, 25],
-    "Shares": [10, 5, 2, 20, 3],
-    "Avg_Rating": [4.5, 4.2, 3.8, 4.7, 4.0] # Conceptual rating
+    "Prompt Name": ("Creative Story Starter", "Email for Client Update", "Python Function", "Social Media Post", "Debate Argument"),
+    "Generations": (250, 300, 180, 400, 120),
+    "Saves": (50, 70, 30, 90, 25),
+    "Shares": (10, 5, 2, 20, 3),
+    "Avg_Rating": (4.5, 4.2, 3.8, 4.7, 4.0) # Conceptual rating
 }
-CONCEPTUAL_PERFORMANCE_DF = pd.DataFrame(CONCEPTUAL_PROMPT_PERFORMANCE)
+
+@st.cache_data(show_spinner=False)
+def _usage_df() -> "pd.DataFrame":
+    """
+    Builds the conceptual usage DataFrame on first use and caches it across reruns.
+    """
+    import pandas as pd
+    usage_df = pd.DataFrame({column: list(values) for column, values in CONCEPTUAL_USAGE_DATA.items()})
+    usage_df["date"] = pd.to_datetime(usage_df["date"], format="%Y-%m-%d")
+    return usage_df
+
+@st.cache_data(show_spinner=False)
+def _performance_df() -> "pd.DataFrame":
+    """
+    Builds the conceptual prompt performance DataFrame on first use and caches it across reruns.
+    """
+    import pandas as pd
+    return pd.DataFrame({column: list(values) for column, values in CONCEPTUAL_PROMPT_PERFORMANCE.items()})
 
 # ====================================================================================================
 # SECTION 2: CONCEPTUAL ANALYTICS LOGIC
 # These functions simulate data aggregation and insight generation.
 # ====================================================================================================
 
-def conceptual_generate_usage_trends_chart(df: pd.DataFrame):
+@st.cache_data(show_spinner=False)
+def build_usage_trends_spec() -> dict:
     """
-    (Conceptual) Generates an Altair chart for usage trends.
+    (Conceptual) Builds the Vega-Lite spec for the usage trends chart.
+    The melt and the Altair serialization run once; reruns reuse the cached spec.
+
+    Returns:
+        dict: The chart spec, or an empty dict if there is no data to chart.
     """
+    import altair as alt
+    df = _usage_df()
     if df.empty:
-        st.warning("No usage data available for charting.")
-        return
+        return {}
 
     # Melt DataFrame for multi-line chart
     melted_df = df.melt('date', var_name='Metric', value_name='Count')
@@ -76,20 +103,27 @@ def conceptual_generate_usage_trends_chart(df: pd.DataFrame):
     ).properties(
         title='Conceptual PromptGPT Suite Usage Trends'
     ).interactive()
-    st.altair_chart(chart, use_container_width=True)
-    logger.info("Conceptual usage trends chart generated.")
+    return chart.to_dict()
 
-def conceptual_generate_best_prompts_chart(df: pd.DataFrame):
+@st.cache_data(show_spinner=False)
+def build_best_prompts_spec() -> dict:
     """
-    (Conceptual) Generates an Altair chart for best performing prompts.
+    (Conceptual) Builds the Vega-Lite spec for the best performing prompts chart.
+    Scoring, sorting and Altair serialization run once; reruns reuse the cached spec.
+
+    Returns:
+        dict: The chart spec, or an empty dict if there is no data to chart.
     """
+    import altair as alt
+    df = _performance_df()
     if df.empty:
-        st.warning("No prompt performance data available for charting.")
-        return
+        return {}
 
     # Sort by a conceptual "performance score" (e.g., based on Generations, Saves, Shares, Rating)
-    df['Performance_Score'] = (df['Generations'] * 0.4) + (df['Saves'] * 0.3) + (df['Shares'] * 0.2) + (df['Avg_Rating'] * 10)
-    df_sorted = df.sort_values('Performance_Score', ascending=False).head(5)
+    scored_df = df.assign(
+        Performance_Score=(df['Generations'] * 0.4) + (df['Saves'] * 0.3) + (df['Shares'] * 0.2) + (df['Avg_Rating'] * 10)
+    )
+    df_sorted = scored_df.sort_values('Performance_Score', ascending=False).head(5)
 
     chart = alt.Chart(df_sorted).mark_bar().encode(
         x=alt.X('Performance_Score', title='Performance Score (Conceptual)'),
@@ -98,7 +132,28 @@ def conceptual_generate_best_prompts_chart(df: pd.DataFrame):
     ).properties(
         title='Top 5 Conceptual Performing Prompts'
     ).interactive()
-    st.altair_chart(chart, use_container_width=True)
+    return chart.to_dict()
+
+def conceptual_generate_usage_trends_chart():
+    """
+    (Conceptual) Renders the usage trends chart from its cached spec.
+    """
+    spec = build_usage_trends_spec()
+    if not spec:
+        st.warning("No usage data available for charting.")
+        return
+    st.vega_lite_chart(spec, use_container_width=True)
+    logger.info("Conceptual usage trends chart generated.")
+
+def conceptual_generate_best_prompts_chart():
+    """
+    (Conceptual) Renders the best performing prompts chart from its cached spec.
+    """
+    spec = build_best_prompts_spec()
+    if not spec:
+        st.warning("No prompt performance data available for charting.")
+        return
+    st.vega_lite_chart(spec, use_container_width=True)
     logger.info("Conceptual best prompts chart generated.")
 
 # ====================================================================================================
@@ -106,7 +161,7 @@ def conceptual_generate_best_prompts_chart(df: pd.DataFrame):
 # This section defines the user interface for the Analytics & Reports module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def run():
     """
     Main function to run the Analytics & Reports module's Streamlit UI.
     This function is called by app.py when the 'Analytics & Reports' module is selected.
@@ -123,14 +178,14 @@ def run(api_key_valid: bool):
     # 3.1 Conceptual Usage Trends
     st.subheader("📈 Prompt Usage Trends (Simulated)")
     st.write("Monitor how often prompts are generated, saved, and chat interactions occur over time.")
-    conceptual_generate_usage_trends_chart(CONCEPTUAL_USAGE_DF)
+    conceptual_generate_usage_trends_chart()
 
     st.markdown("---")
 
     # 3.2 Conceptual Best Performing Prompts
     st.subheader("🏆 Best Performing Prompts (Simulated)")
     st.write("Identify which of your prompt templates are most frequently used, saved, and shared.")
-    conceptual_generate_best_prompts_chart(CONCEPTUAL_PERFORMANCE_DF)
+    conceptual_generate_best_prompts_chart()
 
     st.markdown("---")
 
@@ -4,7 +4,10 @@
 
 import streamlit as st
 import logging
+import re # For parsing numbered batch translation responses
 from modules import shared_utils # Import shared utility functions
+from modules import _ratelimit # Token-bucket pacing for Gemini calls
+from modules import _llm_cache # Response cache for translated prompts
 
 logger = logging.getLogger(__name__)
 
@@ -30,20 +33,181 @@ Bridge language barriers in your AI interactions!
 
 # Conceptual list of supported languages for translation.
 # In a real app, this would be dynamically fetched from a translation API.
-CONCEPTUAL_LANGUAGES = [
+CONCEPTUAL_LANGUAGES = (
     "English", "Spanish", "French", "German", "Chinese (Simplified)",
     "Japanese", "Korean", "Italian", "Portuguese", "Russian", "Arabic",
     "Hindi", "Bengali", "Dutch", "Swedish", "Polish", "Turkish", "Vietnamese"
-]
+)
+# Position of each language in CONCEPTUAL_LANGUAGES, for O(1) selectbox index resolution.
+CONCEPTUAL_LANGUAGE_INDEX = {language: i for i, language in enumerate(CONCEPTUAL_LANGUAGES)}
+
+# Instruction prepended to batch translation requests. Prompts follow as a numbered list,
+# and the model is asked to answer with the same numbering so results can be matched back.
+BATCH_TRANSLATION_INSTRUCTION = (
+    "Translate each of the following prompts into {target_language}. "
+    "Maintain the original tone and intent of each prompt. "
+    "Preserve the numbering and respond with only the numbered translations:"
+)
+
+# Matches the "1. " / "2) " item markers at the start of a line in a numbered response.
+NUMBERED_ITEM_PATTERN = re.compile(r"^\s*(\d+)[.)]\s+", re.MULTILINE)
+
+# Per-item result when a prompt could not be translated (request failed, response unusable,
+# or a Replay cache miss). Shows the original text rather than an unrelated canned translation.
+TRANSLATION_UNAVAILABLE_TEMPLATE = "[Translation to {target_language} unavailable] {prompt}"
+
+# Placeholder shown in the output area before anything has been translated.
+ML_OUTPUT_PLACEHOLDER = "The translated prompt will appear here."
+
+# Session-state defaults for this module, seeded once at the top of `run()`.
+ML_SESSION_DEFAULTS = {
+    "ml_original_prompt": "Write a short article about the benefits of quantum computing.",
+    "ml_selected_language": "Spanish",
+    "ml_translated_output": ML_OUTPUT_PLACEHOLDER,
+}
+
+# Session-state values applied by the Clear button.
+ML_CLEAR_STATE = {
+    "ml_original_prompt": "",
+    "ml_translated_output": "",
+    "ml_selected_language": "Spanish",
+}
+
+# Input widget keys, dropped by the Clear button so the widgets are re-seeded from the keys above.
+ML_WIDGET_STATE_KEYS = ("ml_original_prompt_input", "ml_target_language_select")
 
 # ====================================================================================================
 # SECTION 2: CONCEPTUAL TRANSLATION LOGIC
 # These functions simulate the translation process.
 # ====================================================================================================
 
+def build_batch_translation_payload(prompts: list, target_language: str) -> str:
+    """
+    Builds a single translation request covering several prompts as a numbered list.
+
+    Args:
+        prompts (list): The unique prompt strings to translate.
+        target_language (str): The language to translate the prompts into.
+
+    Returns:
+        str: The payload to send to the model.
+    """
+    payload_lines = [BATCH_TRANSLATION_INSTRUCTION.format(target_language=target_language)]
+    payload_lines.extend(f"{i}. {prompt}" for i, prompt in enumerate(prompts, start=1))
+    return "\n".join(payload_lines)
+
+def parse_numbered_translation_response(raw_response: str, expected_count: int):
+    """
+    Splits a numbered-list model response back into individual translations.
+
+    Args:
+        raw_response (str): The model's response text.
+        expected_count (int): The number of prompts that were sent.
+
+    Returns:
+        list: The translations in request order, or None if any numbered item is missing.
+    """
+    markers = list(NUMBERED_ITEM_PATTERN.finditer(raw_response))
+    items = {}
+    for marker, next_marker in zip(markers, markers[1:] + [None]):
+        end = next_marker.start() if next_marker else len(raw_response)
+        items[int(marker.group(1))] = raw_response[marker.end():end].strip()
+    if any(not items.get(i) for i in range(1, expected_count + 1)):
+        return None
+    return [items[i] for i in range(1, expected_count + 1)]
+
+def _translation_cache_key(prompt: str, target_language: str, model_name: str) -> str:
+    """
+    Response-cache key of one prompt's translation: the single-item payload, so a prompt
+    translated inside any batch is found again on its own or in a different batch.
+    """
+    return _llm_cache.make_cache_key(
+        build_batch_translation_payload([prompt], target_language), model_name, shared_utils.GEMINI_GENERATION_CONFIG
+    )
+
+def _batch_translate_with_model(prompts: list, target_language: str, model) -> dict:
+    """
+    Translates unique prompts, serving earlier translations from the response cache and sending
+    the rest in a single model request. Successful translations are stored in the cache; prompts
+    whose request fails or cannot be matched to the response get a per-item placeholder.
+
+    Returns:
+        dict: A mapping of each input prompt to its translation (or placeholder).
+    """
+    model_name = getattr(model, "model_name", shared_utils.DEFAULT_GEMINI_MODEL)
+    cache_policy = shared_utils.get_llm_cache_policy()
+    cache_keys = {prompt: _translation_cache_key(prompt, target_language, model_name) for prompt in prompts}
+
+    translated = {}
+    for prompt, cache_key in cache_keys.items():
+        cached_text = _llm_cache.get_cached_response(cache_key, cache_policy)
+        if cached_text is not None:
+            translated[prompt] = cached_text
+    uncached_prompts = [prompt for prompt in prompts if prompt not in translated]
+    if translated:
+        logger.info("Served %d translation(s) from the response cache.", len(translated))
+
+    if uncached_prompts:
+        payload = build_batch_translation_payload(uncached_prompts, target_language)
+        translations = None
+        try:
+            _llm_cache.ensure_live_call_allowed(cache_policy) # Raises CacheMiss under Replay.
+            with _ratelimit.acquire(shared_utils.get_api_key_digest(), estimated_tokens=len(payload) // 4):
+                response = model.generate_content(payload)
+            translations = parse_numbered_translation_response(response.text, len(uncached_prompts))
+        except _llm_cache.CacheMiss as e:
+            logger.info("Batch translation skipped: %s", e)
+        except Exception as e:
+            logger.error("Batch translation request failed: %s", e, exc_info=True)
+
+        if translations is None:
+            logger.warning("Batch translation unavailable; returning placeholders for %d prompt(s).", len(uncached_prompts))
+            for prompt in uncached_prompts:
+                translated[prompt] = TRANSLATION_UNAVAILABLE_TEMPLATE.format(target_language=target_language, prompt=prompt)
+        else:
+            for prompt, translation in zip(uncached_prompts, translations):
+                translated[prompt] = translation
+                _llm_cache.store_response(cache_keys[prompt], translation, cache_policy)
+    return translated
+
+def conceptual_translate_prompts(prompts: list, target_language: str, model) -> list:
+    """
+    (Conceptual) Translates several prompts with one model request.
+    Duplicate prompts are sent once, empty prompts are not sent at all, and prompts
+    translated before are served from the response cache.
+
+    Args:
+        prompts (list): The prompt strings to translate.
+        target_language (str): The language to translate the prompts into.
+        model: The initialized Gemini model.
+
+    Returns:
+        list: The translated prompts, in the same order as `prompts`.
+    """
+    if not model:
+        logger.warning("Conceptual translation skipped: No model.")
+        return [f"Translation to {target_language} (conceptual): {prompt}" for prompt in prompts] # Placeholder
+
+    # Deduplicate (preserving order) before sending, so identical prompts cost nothing extra.
+    pending_prompts = [prompt for prompt in dict.fromkeys(prompts) if prompt.strip()]
+    already_translated = {}
+    if pending_prompts:
+        logger.info("Translating %d unique prompt(s) to %s.", len(pending_prompts), target_language)
+        already_translated = _batch_translate_with_model(pending_prompts, target_language, model)
+
+    results = []
+    for prompt in prompts:
+        if prompt in already_translated:
+            results.append(already_translated[prompt])
+        else:
+            logger.warning("Conceptual translation skipped: Empty prompt.")
+            results.append(f"Translation to {target_language} (conceptual): {prompt}") # Placeholder
+    return results
+
 def conceptual_translate_prompt(prompt_text: str, target_language: str, model) -> str:
     """
     (Conceptual) Translates a prompt using an AI model (e.g., Gemini instructed to translate).
+    Thin wrapper over `conceptual_translate_prompts` for a single prompt.
 
     Args:
         prompt_text (str): The prompt string to translate.
@@ -53,24 +217,7 @@ def conceptual_translate_prompt(prompt_text: str, target_language: str, model) -
     Returns:
         str: The translated prompt. Returns original if translation is not implemented.
     """
-    if not model or not prompt_text.strip():
-        logger.warning("Conceptual translation skipped: No model or empty prompt.")
-        return f"Translation to {target_language} (conceptual): {prompt_text}" # Placeholder
-
-    # In a real scenario, you would construct a prompt for Gemini like:
-    # "Translate the following prompt into [target_language]. Maintain its original tone and intent: [prompt_text]"
-    # And then call model.generate_content.
-
-    logger.info(f"Conceptually translating prompt to {target_language}.")
-    # Simple, hardcoded translation simulation for demo purposes
-    if target_language == "Spanish":
-        return f"Por favor, escribe un breve artículo sobre los beneficios de la computación cuántica."
-    elif target_language == "French":
-        return f"Veuillez rédiger un court article sur les avantages de l'informatique quantique."
-    elif target_language == "German":
-        return f"Bitte schreiben Sie einen kurzen Artikel über die Vorteile des Quantencomputings."
-    else:
-        return f"[Translated to {target_language}]: {prompt_text}" # Default placeholder
+    return conceptual_translate_prompts([prompt_text], target_language, model)[0]
 
 
 # ====================================================================================================
@@ -78,11 +225,22 @@ def conceptual_translate_prompt(prompt_text: str, target_language: str, model) -
 # This section defines the user interface for the Multilingual Prompt Assistant module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def _clear_multilingual_state():
+    """
+    on_click callback for the Clear button. Callbacks run before the script reruns, so the
+    widgets are created with the reset values and no extra rerun is needed.
+    """
+    st.session_state.update(ML_CLEAR_STATE)
+    for widget_key in ML_WIDGET_STATE_KEYS:
+        st.session_state.pop(widget_key, None)
+
+def run():
     """
     Main function to run the Multilingual Prompt Assistant module's Streamlit UI.
     This function is called by app.py when the 'Multilingual Prompt Assistant' module is selected.
     """
+    shared_utils.seed_session_defaults(ML_SESSION_DEFAULTS)
+
     st.header("🌐 Multilingual Prompt Assistant")
     st.markdown("Translate and localize your prompts for diverse linguistic needs.")
     st.markdown("---")
@@ -96,7 +254,7 @@ def run(api_key_valid: bool):
     st.subheader("📝 Enter Prompt for Translation")
     original_prompt = st.text_area(
         "Paste the prompt you want to translate:",
-        value=st.session_state.get("ml_original_prompt", "Write a short article about the benefits of quantum computing."),
+        value=st.session_state["ml_original_prompt"],
         height=150,
         placeholder="Enter your prompt here...",
         key="ml_original_prompt_input"
@@ -105,8 +263,7 @@ def run(api_key_valid: bool):
 
     # Select target language
     st.subheader("🌍 Select Target Language")
-    selected_language_index = CONCEPTUAL_LANGUAGES.index(st.session_state.get("ml_selected_language", "Spanish")) \
-        if st.session_state.get("ml_selected_language", "Spanish") in CONCEPTUAL_LANGUAGES else 0
+    selected_language_index = CONCEPTUAL_LANGUAGE_INDEX.get(st.session_state["ml_selected_language"], 0)
     selected_language = st.selectbox(
         "Translate to:",
         options=CONCEPTUAL_LANGUAGES,
@@ -128,52 +285,37 @@ def run(api_key_valid: bool):
     with col_translate:
         translate_button_clicked = st.button("🌐 Translate Prompt", use_container_width=True, key="ml_translate_button")
     with col_clear:
-        clear_button_clicked = st.button(
+        st.button(
             "🗑️ Clear",
             use_container_width=True,
             key="ml_clear_button",
-            help="Clear all inputs and translated output."
+            help="Clear all inputs and translated output.",
+            on_click=_clear_multilingual_state
         )
 
-    # Handle clear button click
-    if clear_button_clicked:
-        st.session_state["ml_original_prompt"] = ""
-        st.session_state["ml_translated_output"] = ""
-        st.session_state["ml_selected_language"] = "Spanish"
-        st.experimental_rerun()
+    # Logic for translation
+    # Handled before the output area is drawn, so the new translation renders in this same run
+    # without an extra rerun.
+    if translate_button_clicked:
+        if not original_prompt.strip():
+            st.error("Please enter a prompt to translate.")
+        else:
+            logger.info("Initiating conceptual translation to '%s'.", selected_language)
+            # In a real app, you'd pass shared_utils.get_gemini_model(st.session_state["gemini_api_key"])
+            # and handle actual API calls.
+            translated_text = conceptual_translate_prompt(original_prompt, selected_language, model=None)
+            st.session_state["ml_translated_output"] = translated_text
+            st.success(f"Prompt conceptually translated to {selected_language}!")
 
     # Output display area
     st.subheader("➡️ Translated Prompt Output")
-    if "ml_translated_output" not in st.session_state:
-        st.session_state["ml_translated_output"] = "The translated prompt will appear here."
-
-    translated_output_display = st.text_area(
-        "Translated Prompt:",
-        value=st.session_state["ml_translated_output"],
-        height=300,
-        key="ml_translated_output_area",
-        disabled=True
-    )
-
-    if st.session_state["ml_translated_output"] and st.session_state["ml_translated_output"] != "The translated prompt will appear here.":
-        shared_utils.add_copy_to_clipboard_button(st.session_state["ml_translated_output"], shared_utils.MSG_COPY_BUTTON)
+    if st.session_state["ml_translated_output"] and st.session_state["ml_translated_output"] != ML_OUTPUT_PLACEHOLDER:
+        # The copy block is the display of the translated prompt.
+        shared_utils.add_copy_to_clipboard_button(st.session_state["ml_translated_output"])
         st.info("The prompt has been translated. Copy it for use.")
     else:
+        st.caption(ML_OUTPUT_PLACEHOLDER)
         st.info("Enter a prompt and select a language to translate.")
 
-    # Logic for translation
-    if translate_button_clicked:
-        if not original_prompt.strip():
-            st.error("Please enter a prompt to translate.")
-            return
-
-        logger.info(f"Initiating conceptual translation to '{selected_language}'.")
-        # In a real app, you'd pass shared_utils.get_gemini_model(st.session_state["gemini_api_key"])
-        # and handle actual API calls.
-        translated_text = conceptual_translate_prompt(original_prompt, selected_language, model=None)
-        st.session_state["ml_translated_output"] = translated_text
-        st.success(f"Prompt conceptually translated to {selected_language}!")
-        st.experimental_rerun()
-
     shared_utils.display_ai_powered_notice()
     logger.info("Multilingual Prompt Assistant module UI rendered (conceptual).")
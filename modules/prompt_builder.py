@@ -39,12 +39,53 @@ CONCEPTUAL_BUILDING_BLOCKS = [
     "Context Information", "Audience Definition"
 ]
 
+# Options for the Tone and Format selector blocks, with precomputed positions for the selectboxes.
+BUILDER_TONE_OPTIONS = ("Formal", "Informal", "Creative")
+BUILDER_TONE_INDEX = {tone: i for i, tone in enumerate(BUILDER_TONE_OPTIONS)}
+BUILDER_FORMAT_OPTIONS = ("Paragraph", "Bullet Points", "JSON")
+BUILDER_FORMAT_INDEX = {output_format: i for i, output_format in enumerate(BUILDER_FORMAT_OPTIONS)}
+
+# Placeholder shown in the preview area before a prompt has been assembled.
+PB_OUTPUT_PLACEHOLDER = "Select blocks and fill in details to see your prompt assembled here."
+
+# Session-state defaults for this module, seeded once at the top of `run()`.
+PB_SESSION_DEFAULTS = {
+    "pb_selected_blocks": [],
+    "pb_task_input": "",
+    "pb_tone_idx": 0,
+    "pb_format_idx": 0,
+    "pb_constraints_input": "",
+    "pb_role_input": "",
+    "pb_assembled_prompt": PB_OUTPUT_PLACEHOLDER,
+}
+
+# Session-state values applied by the Clear button. The list is copied per use (see `_clear_builder_state()`).
+PB_CLEAR_STATE = {**PB_SESSION_DEFAULTS, "pb_assembled_prompt": ""}
+
+# Input widget keys, dropped by the Clear button so the widgets are re-seeded from the keys above.
+PB_WIDGET_STATE_KEYS = (
+    "pb_block_selector", "pb_task_def_input", "pb_tone_select", "pb_format_select",
+    "pb_constraints_input_area", "pb_role_input_text"
+)
+
 # ====================================================================================================
 # SECTION 2: CONCEPTUAL BUILDER LOGIC
 # These functions represent the backend logic for assembling and rendering prompts
 # from a visual builder.
 # ====================================================================================================
 
+# Maps each supported block name to a formatter that turns the block's data into a prompt
+# fragment. A formatter returns None when the data it needs is missing. Blocks without an
+# entry are conceptual only and are skipped during assembly.
+BLOCK_FORMATTERS = {
+    "Task Definition": lambda data: f"Task: {data['task']}" if "task" in data else None,
+    "Tone Selector": lambda data: f"Tone: {data['tone']}" if "tone" in data else None,
+    "Format Selector": lambda data: f"Format: {data['format']}" if "format" in data else None,
+    "Constraint Block": lambda data: f"Constraints: {', '.join(data['constraints'])}" if "constraints" in data else None,
+    "Role Definition": lambda data: f"Assume the role of: {data['role']}" if "role" in data else None,
+    "Chain-of-Thought Trigger": lambda data: "Think step-by-step to arrive at the answer.",
+}
+
 def conceptual_assemble_prompt_from_blocks(selected_blocks: list, block_data: dict) -> str:
     """
     (Conceptual) Assembles a prompt string from a list of selected building blocks and their data.
@@ -57,41 +98,40 @@ def conceptual_assemble_prompt_from_blocks(selected_blocks: list, block_data: di
     Returns:
         str: The assembled prompt string.
     """
-    assembled_prompt_parts = []
-    logger.info(f"Conceptually assembling prompt from {len(selected_blocks)} blocks.")
-
-    # Simulate logic for each block
-    for block_name in selected_blocks:
-        if block_name == "Task Definition" and "task" in block_data:
-            assembled_prompt_parts.append(f"Task: {block_data['task']}")
-        elif block_name == "Tone Selector" and "tone" in block_data:
-            assembled_prompt_parts.append(f"Tone: {block_data['tone']}")
-        elif block_name == "Format Selector" and "format" in block_data:
-            assembled_prompt_parts.append(f"Format: {block_data['format']}")
-        elif block_name == "Constraint Block" and "constraints" in block_data:
-            constraints_str = ", ".join(block_data["constraints"])
-            assembled_prompt_parts.append(f"Constraints: {constraints_str}")
-        elif block_name == "Role Definition" and "role" in block_data:
-            assembled_prompt_parts.append(f"Assume the role of: {block_data['role']}")
-        elif block_name == "Chain-of-Thought Trigger":
-            assembled_prompt_parts.append("Think step-by-step to arrive at the answer.")
-        # Add more block logic here for other conceptual blocks
-
-    if not assembled_prompt_parts:
+    logger.info("Conceptually assembling prompt from %d blocks.", len(selected_blocks))
+
+    # Simulate logic for each block. Add more block logic to BLOCK_FORMATTERS for other conceptual blocks.
+    assembled_prompt = "\n\n".join(filter(None, (
+        BLOCK_FORMATTERS[block_name](block_data)
+        for block_name in selected_blocks if block_name in BLOCK_FORMATTERS
+    )))
+
+    if not assembled_prompt:
         return "No blocks selected or insufficient data to assemble a prompt."
 
-    return "\n\n".join(assembled_prompt_parts)
+    return assembled_prompt
 
 # ====================================================================================================
 # SECTION 3: STREAMLIT UI LAYOUT AND INTERACTION
 # This section defines the user interface for the Prompt Builder module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def _clear_builder_state():
+    """
+    on_click callback for the Clear button. Callbacks run before the script reruns, so the
+    widgets are created with the reset values and no extra rerun is needed.
+    """
+    st.session_state.update({**PB_CLEAR_STATE, "pb_selected_blocks": []})
+    for widget_key in PB_WIDGET_STATE_KEYS:
+        st.session_state.pop(widget_key, None)
+
+def run():
     """
     Main function to run the Prompt Builder module's Streamlit UI.
     This function is called by app.py when the 'Prompt Builder (No-Code)' module is selected.
     """
+    shared_utils.seed_session_defaults(PB_SESSION_DEFAULTS)
+
     st.header("🏗️ Prompt Builder (No-Code)")
     st.markdown("Visually design and construct complex prompts using a drag-and-drop interface.")
     st.markdown("---")
@@ -108,7 +148,7 @@ def run(api_key_valid: bool):
     selected_conceptual_blocks = st.multiselect(
         "Choose your prompt building blocks:",
         options=CONCEPTUAL_BUILDING_BLOCKS,
-        default=st.session_state.get("pb_selected_blocks", []),
+        default=st.session_state["pb_selected_blocks"],
         key="pb_block_selector",
         help="Select components you want to include in your prompt."
     )
@@ -119,20 +159,20 @@ def run(api_key_valid: bool):
 
     # Dynamic input fields for selected blocks
     if "Task Definition" in selected_conceptual_blocks:
-        block_data["task"] = st.text_input("Task Description:", value=st.session_state.get("pb_task_input", ""), key="pb_task_def_input")
+        block_data["task"] = st.text_input("Task Description:", value=st.session_state["pb_task_input"], key="pb_task_def_input")
         st.session_state["pb_task_input"] = block_data["task"]
     if "Tone Selector" in selected_conceptual_blocks:
-        block_data["tone"] = st.selectbox("Tone:", options=["Formal", "Informal", "Creative"], key="pb_tone_select", index=st.session_state.get("pb_tone_idx", 0))
-        st.session_state["pb_tone_idx"] = ["Formal", "Informal", "Creative"].index(block_data["tone"])
+        block_data["tone"] = st.selectbox("Tone:", options=BUILDER_TONE_OPTIONS, key="pb_tone_select", index=st.session_state["pb_tone_idx"])
+        st.session_state["pb_tone_idx"] = BUILDER_TONE_INDEX[block_data["tone"]]
     if "Format Selector" in selected_conceptual_blocks:
-        block_data["format"] = st.selectbox("Format:", options=["Paragraph", "Bullet Points", "JSON"], key="pb_format_select", index=st.session_state.get("pb_format_idx", 0))
-        st.session_state["pb_format_idx"] = ["Paragraph", "Bullet Points", "JSON"].index(block_data["format"])
+        block_data["format"] = st.selectbox("Format:", options=BUILDER_FORMAT_OPTIONS, key="pb_format_select", index=st.session_state["pb_format_idx"])
+        st.session_state["pb_format_idx"] = BUILDER_FORMAT_INDEX[block_data["format"]]
     if "Constraint Block" in selected_conceptual_blocks:
-        constraints_str = st.text_area("Constraints (one per line):", value=st.session_state.get("pb_constraints_input", ""), key="pb_constraints_input_area")
-        block_data["constraints"] = [c.strip() for c in constraints_str.split('\n') if c.strip()]
+        constraints_str = st.text_area("Constraints (one per line):", value=st.session_state["pb_constraints_input"], key="pb_constraints_input_area")
+        block_data["constraints"] = list(filter(None, (c.strip() for c in constraints_str.splitlines())))
         st.session_state["pb_constraints_input"] = constraints_str
     if "Role Definition" in selected_conceptual_blocks:
-        block_data["role"] = st.text_input("Role for AI:", value=st.session_state.get("pb_role_input", ""), key="pb_role_input_text")
+        block_data["role"] = st.text_input("Role for AI:", value=st.session_state["pb_role_input"], key="pb_role_input_text")
         st.session_state["pb_role_input"] = block_data["role"]
 
     st.markdown("---")
@@ -141,54 +181,35 @@ def run(api_key_valid: bool):
     with col_build:
         build_button_clicked = st.button("🏗️ Build Prompt", use_container_width=True, key="pb_build_button")
     with col_clear:
-        clear_button_clicked = st.button(
+        st.button(
             "🗑️ Clear",
             use_container_width=True,
             key="pb_clear_button",
-            help="Clear all selections and generated prompt."
+            help="Clear all selections and generated prompt.",
+            on_click=_clear_builder_state
         )
 
-    # Handle clear button click
-    if clear_button_clicked:
-        st.session_state["pb_selected_blocks"] = []
-        st.session_state["pb_task_input"] = ""
-        st.session_state["pb_tone_idx"] = 0
-        st.session_state["pb_format_idx"] = 0
-        st.session_state["pb_constraints_input"] = ""
-        st.session_state["pb_role_input"] = ""
-        st.session_state["pb_assembled_prompt"] = ""
-        st.experimental_rerun()
+    # Logic for building the prompt
+    # Handled before the preview area is drawn, so the assembled prompt renders in this same run
+    # without an extra rerun.
+    if build_button_clicked:
+        if not selected_conceptual_blocks:
+            st.error("Please select at least one building block to construct the prompt.")
+        else:
+            logger.info("Building prompt from selected blocks.")
+            assembled_text = conceptual_assemble_prompt_from_blocks(selected_conceptual_blocks, block_data)
+            st.session_state["pb_assembled_prompt"] = assembled_text
+            st.success("Prompt successfully assembled!")
 
     # Output display area
     st.subheader("📝 Assembled Prompt Preview")
-    if "pb_assembled_prompt" not in st.session_state:
-        st.session_state["pb_assembled_prompt"] = "Select blocks and fill in details to see your prompt assembled here."
-
-    assembled_prompt_display = st.text_area(
-        "Preview of Assembled Prompt:",
-        value=st.session_state["pb_assembled_prompt"],
-        height=300,
-        key="pb_assembled_prompt_output",
-        disabled=True
-    )
-
-    if st.session_state["pb_assembled_prompt"] and st.session_state["pb_assembled_prompt"] != "Select blocks and fill in details to see your prompt assembled here.":
-        shared_utils.add_copy_to_clipboard_button(st.session_state["pb_assembled_prompt"], shared_utils.MSG_COPY_BUTTON)
+    if st.session_state["pb_assembled_prompt"] and st.session_state["pb_assembled_prompt"] != PB_OUTPUT_PLACEHOLDER:
+        # The copy block is the preview of the assembled prompt.
+        shared_utils.add_copy_to_clipboard_button(st.session_state["pb_assembled_prompt"])
         st.info("The prompt above is assembled from your selected blocks. Copy it for use.")
     else:
+        st.caption(PB_OUTPUT_PLACEHOLDER)
         st.info("Start by selecting blocks from the 'Conceptual Building Blocks' section.")
 
-    # Logic for building the prompt
-    if build_button_clicked:
-        if not selected_conceptual_blocks:
-            st.error("Please select at least one building block to construct the prompt.")
-            return
-
-        logger.info("Building prompt from selected blocks.")
-        assembled_text = conceptual_assemble_prompt_from_blocks(selected_conceptual_blocks, block_data)
-        st.session_state["pb_assembled_prompt"] = assembled_text
-        st.success("Prompt successfully assembled!")
-        st.experimental_rerun()
-
     shared_utils.display_ai_powered_notice()
     logger.info("Prompt Builder module UI rendered (conceptual).")
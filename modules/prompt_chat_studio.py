@@ -5,7 +5,10 @@
 
 import streamlit as st
 import logging
+import sys # For interning static text constants
+from typing import Final
 from modules import shared_utils # Import shared utility functions
+from modules import _ratelimit # Token-bucket pacing for Gemini calls
 
 logger = logging.getLogger(__name__)
 
@@ -15,25 +18,33 @@ logger = logging.getLogger(__name__)
 # ====================================================================================================
 
 # 1.1 Initial Chat Instructions
-CHAT_STUDIO_HELP_MESSAGE = """
+CHAT_STUDIO_HELP_MESSAGE: Final[str] = sys.intern("""
 ### Welcome to the Prompt Chat Studio!
 Engage in a live conversation with Gemini to refine your prompts or generate content.
 * **Type your message** in the input box at the bottom.
 * **Press Enter** or click 'Send' to get an AI response.
 * The conversation history will be displayed above.
 * You can restart the chat anytime by clicking 'Clear Chat'.
-"""
+""")
 
 # 1.2 Chat Model System Instruction
 # This initial instruction sets the persona and goal for the Gemini model within the chat.
-SYSTEM_INSTRUCTION = """
+SYSTEM_INSTRUCTION: Final[str] = sys.intern("""
 You are 'PromptGPT Chat Assistant', an expert in crafting and refining AI prompts,
 and generating high-quality content. You will respond to user queries, help them
 optimize their prompts, generate creative or factual text based on their needs,
 and maintain a helpful, concise, and professional tone throughout the conversation.
 If a user asks for a prompt, provide a clear and actionable prompt.
 If they ask for content, provide the content directly.
-"""
+""")
+
+# 1.3 Chat Export Configuration
+# Speaker labels used in the Markdown export, keyed by chat history role.
+CHAT_EXPORT_ROLE_LABELS = {"user": "You", "model": "AI"}
+
+# 1.4 Chat Display Configuration
+# Only the most recent messages are rendered on each rerun; older ones are rendered on demand.
+MAX_LIVE_MESSAGES = 50
 
 # ====================================================================================================
 # SECTION 2: CHAT LOGIC AND GEMINI INTERACTION
@@ -53,32 +64,39 @@ def get_chat_model(api_key: str):
     """
     Retrieves and initializes the Gemini conversational model.
     Unlike text generation, chat models handle multi-turn conversations.
+
+    The chat session lives in session state; the underlying model is only looked up
+    (from the shared model cache) when a new session has to be started.
     """
+    if "chat_session" in st.session_state:
+        return st.session_state.chat_session
+
     model = shared_utils.get_gemini_model(api_key)
     if model:
         # Create a GenerativeModel instance for chat.
         # This allows for the start_chat method.
         # Note: If the model itself is not compatible with start_chat (e.g., a pure text model),
         # this might need adjustment. gemini-pro generally supports it.
-        if "chat_session" not in st.session_state:
-            try:
-                st.session_state.chat_session = model.start_chat(history=[])
-                logger.info("New chat session started with Gemini model.")
-            except Exception as e:
-                logger.error(f"Failed to start chat session with Gemini: {e}", exc_info=True)
-                st.error("Could not start chat session. Please check your API key and model compatibility.")
-                del st.session_state.chat_session # Clear invalid session
-                return None
+        try:
+            st.session_state.chat_session = model.start_chat(history=[])
+            logger.info("New chat session started with Gemini model.")
+        except Exception as e:
+            logger.error("Failed to start chat session with Gemini: %s", e, exc_info=True)
+            st.error("Could not start chat session. Please check your API key and model compatibility.")
+            st.session_state.pop("chat_session", None) # Clear invalid session
+            return None
         return st.session_state.chat_session
     return None
 
-def send_message_to_gemini_chat(chat_session, user_message: str):
+def send_message_to_gemini_chat(chat_session, user_message: str, placeholder=None):
     """
     Sends a user message to the Gemini chat session and retrieves the model's response.
 
     Args:
         chat_session: The active Gemini chat session object.
         user_message (str): The message from the user.
+        placeholder (optional): A Streamlit `st.empty()` placeholder. When given, the response
+            is streamed and rendered into it progressively.
 
     Returns:
         str: The AI's response text, or an error message if generation fails.
@@ -87,23 +105,31 @@ def send_message_to_gemini_chat(chat_session, user_message: str):
         return shared_utils.MSG_GENERATION_FAILED + " (Chat session not active.)"
 
     try:
+        api_key_digest = shared_utils.get_api_key_digest() # Selects this API key's rate-limit bucket.
         with st.spinner(shared_utils.MSG_LOADING_AI):
             # Send the message to the generative model and get the response.
             # The chat session manages the history internally.
-            response = chat_session.send_message(user_message)
-            if response and response.text:
+            if placeholder is not None:
+                with _ratelimit.acquire(api_key_digest, estimated_tokens=len(user_message) // 4):
+                    response = chat_session.send_message(user_message, stream=True)
+                response_text = shared_utils.stream_response_to_placeholder(response, placeholder)
+            else:
+                with _ratelimit.acquire(api_key_digest, estimated_tokens=len(user_message) // 4):
+                    response = chat_session.send_message(user_message)
+                response_text = response.text if response else ""
+            if response_text:
                 logger.info("Gemini chat response received.")
-                return response.text
+                return response_text
             else:
                 error_detail = "No text content in chat response."
                 if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
                     error_detail += f" Prompt feedback: {response.prompt_feedback}"
                 if hasattr(response, 'candidates') and not response.candidates:
                     error_detail += " No candidates generated (potentially blocked by safety settings)."
-                logger.error(f"Gemini chat response empty or invalid: {error_detail}")
+                logger.error("Gemini chat response empty or invalid: %s", error_detail)
                 return shared_utils.MSG_GENERATION_FAILED + f" (Details: {error_detail})"
     except Exception as e:
-        logger.error(f"Error during Gemini chat API call: {e}", exc_info=True)
+        logger.error("Error during Gemini chat API call: %s", e, exc_info=True)
         return shared_utils.MSG_GENERATION_FAILED + f" (API Error: {e})"
 
 # ====================================================================================================
@@ -111,11 +137,13 @@ def send_message_to_gemini_chat(chat_session, user_message: str):
 # This section defines the user interface for the Prompt Chat Studio module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def run():
     """
     Main function to run the Prompt Chat Studio module's Streamlit UI.
     This function is called by app.py when the 'Prompt Chat Studio' module is selected.
     """
+    api_key_valid = shared_utils.is_api_key_valid()
+
     st.header("💬 Prompt Chat Studio")
     st.markdown("Interact live with Gemini to refine prompts or generate content.")
     st.markdown("---")
@@ -135,7 +163,7 @@ def run(api_key_valid: bool):
             st.session_state["chat_history"] = []
             if "chat_session" in st.session_state:
                 del st.session_state.chat_session # Reset the chat session to start fresh.
-            st.experimental_rerun() # Force a rerun to clear the display.
+            # The chat container is drawn after this handler, so it already renders empty.
             logger.info("Chat history cleared by user.")
     with col_export:
         # Export Chat History (Conceptual)
@@ -143,12 +171,12 @@ def run(api_key_valid: bool):
         # This button is mostly for demonstrating a conceptual feature.
         export_chat_clicked = st.button("📤 Export Chat", help="Export the current conversation history.")
         if export_chat_clicked:
-            chat_markdown = "## PromptGPT Chat Studio Conversation Log\n\n"
-            for message in st.session_state["chat_history"]:
-                if message["role"] == "user":
-                    chat_markdown += f"**You:** {message['content']}\n\n"
-                else: # role == "model"
-                    chat_markdown += f"**AI:** {message['content']}\n\n"
+            export_parts = ["## PromptGPT Chat Studio Conversation Log\n\n"]
+            export_parts.extend(
+                f"**{CHAT_EXPORT_ROLE_LABELS.get(message['role'], 'AI')}:** {message['content']}\n\n"
+                for message in st.session_state["chat_history"]
+            )
+            chat_markdown = "".join(export_parts)
             # In a real app, you'd use st.download_button or a more complex export.
             st.download_button(
                 label="Download Chat as Markdown",
@@ -169,55 +197,88 @@ def run(api_key_valid: bool):
         if not st.session_state["chat_history"]:
             shared_utils.display_module_help(CHAT_STUDIO_HELP_MESSAGE)
 
-        # Iterate through the chat history and display messages
-        for message in st.session_state["chat_history"]:
-            if message["role"] == "user":
-                with st.chat_message("user"):
-                    st.markdown(message["content"])
-            else: # role == "model"
-                with st.chat_message("assistant"):
-                    st.markdown(message["content"])
+        # Render only the latest MAX_LIVE_MESSAGES so per-rerun work stays bounded for long chats.
+        chat_history = st.session_state["chat_history"]
+        older_count = len(chat_history) - MAX_LIVE_MESSAGES
+        if older_count > 0:
+            if st.checkbox(f"Show {older_count} older messages", key="chat_show_older_messages"):
+                for message in chat_history[:older_count]:
+                    _render_chat_message(message)
+            live_messages = chat_history[older_count:]
+        else:
+            live_messages = chat_history
+
+        for message in live_messages:
+            _render_chat_message(message)
 
     # 3.3 Chat Input Box
     st.markdown("---")
     user_input = st.chat_input(
         "Type your message here...",
-        key="chat_input_box",
-        on_submit=lambda: _process_chat_input(api_key_valid) # Callback to handle input
+        key="chat_input_box"
     )
-    # The on_submit callback handles the main logic.
+    if user_input is not None:
+        # Handled inline (not via on_submit) so the reply can stream into the chat container.
+        _process_chat_input(user_input, chat_container)
     shared_utils.display_ai_powered_notice() # Indicate AI generation.
 
 
-def _process_chat_input(api_key_valid: bool):
+def _render_chat_message(message: dict):
+    """
+    Renders a single chat history entry as a Streamlit chat message.
+
+    Args:
+        message (dict): A chat history entry with 'role' ('user' or 'model') and 'content'.
+    """
+    if message["role"] == "user":
+        with st.chat_message("user"):
+            st.markdown(message["content"])
+    else: # role == "model"
+        with st.chat_message("assistant"):
+            st.markdown(message["content"])
+
+def _process_chat_input(user_message: str, chat_container):
     """
     Internal function to process the chat input when the user submits a message.
-    This is called by the `on_submit` callback of `st.chat_input`.
+    Renders the new exchange directly into `chat_container`, streaming the AI reply,
+    so no rerun is needed to update the chat display.
+
+    Args:
+        user_message (str): The submitted message from `st.chat_input`.
+        chat_container: The container holding the rendered chat history.
     """
-    user_message = st.session_state.chat_input_box.strip()
+    user_message = user_message.strip()
     if user_message:
-        logger.info(f"User message received: {user_message[:100]}...") # Log first 100 chars
+        logger.info("User message received: %.100s...", user_message) # Log first 100 chars
+
+        # Bind the session-state entries once; list mutations are visible through the alias.
+        session_state = st.session_state
+        chat_history = session_state["chat_history"]
 
         # Append user message to history
-        st.session_state["chat_history"].append({"role": "user", "content": user_message})
+        chat_history.append({"role": "user", "content": user_message})
 
-        chat_session = get_chat_model(st.session_state["gemini_api_key"])
+        with chat_container:
+            with st.chat_message("user"):
+                st.markdown(user_message)
+            with st.chat_message("assistant"):
+                response_placeholder = st.empty()
+
+        chat_session = get_chat_model(session_state["gemini_api_key"])
 
         if chat_session:
-            ai_response = send_message_to_gemini_chat(chat_session, user_message)
+            ai_response = send_message_to_gemini_chat(chat_session, user_message, response_placeholder)
 
-            if ai_response:
-                # Append AI response to history
-                st.session_state["chat_history"].append({"role": "model", "content": ai_response})
-            else:
+            if not ai_response:
                 # If AI response failed, add an error message to chat history
-                st.session_state["chat_history"].append({"role": "model", "content": shared_utils.MSG_GENERATION_FAILED})
+                ai_response = shared_utils.MSG_GENERATION_FAILED
         else:
             # If chat session couldn't be initialized, add an error message
-            st.session_state["chat_history"].append({"role": "model", "content": shared_utils.MSG_GENERATION_FAILED + " (Could not start chat session.)"})
+            ai_response = shared_utils.MSG_GENERATION_FAILED + " (Could not start chat session.)"
 
-        # Rerun the app to update the chat display.
-        st.experimental_rerun()
+        # Render the final text (covers error messages that were not streamed) and record it once.
+        response_placeholder.markdown(ai_response)
+        chat_history.append({"role": "model", "content": ai_response})
     else:
         st.warning("Please type a message before sending.")
         logger.warning("Empty chat input submitted.")
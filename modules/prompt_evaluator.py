@@ -5,7 +5,12 @@
 
 import streamlit as st
 import logging
+import sys # For interning result keys
+from typing import Final
+from concurrent.futures import ThreadPoolExecutor, wait # For running evaluation facets in parallel
 from modules import shared_utils # Import shared utility functions
+from modules import _llm_cache # Exact-match response cache for Gemini calls
+from modules import _ratelimit # Token-bucket pacing for Gemini calls
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +19,7 @@ logger = logging.getLogger(__name__)
 # Defines initial messages and conceptual metrics for the evaluator.
 # ====================================================================================================
 
-EVALUATOR_HELP_MESSAGE = """
+EVALUATOR_HELP_MESSAGE: Final[str] = sys.intern("""
 ### Evaluate Your Prompts with AI! (Coming Soon!)
 This module will provide intelligent insights into your prompts.
 **Envisioned Features:**
@@ -29,19 +34,93 @@ This module will provide intelligent insights into your prompts.
 * **Real-time Prompt Audit:** Continuous evaluation as you type.
 
 Stay tuned for powerful analytical capabilities!
-"""
+""")
+
+# Field labels in the evaluation response, mapped to the result keys shown in the UI.
+# Result keys are interned so dict lookups while parsing hit the identity fast path.
+EVALUATION_FIELD_KEYS: Final[dict] = {
+    "Clarity Score": sys.intern("Clarity Score"),
+    "Feedback": sys.intern("Feedback"),
+    "Potential Hallucination Risk": sys.intern("Hallucination Risk"),
+    "Suggested Enhancements": sys.intern("Suggested Enhancements"),
+}
+
+# Values reported for fields the response does not contain.
+EVALUATION_RESULT_DEFAULTS: Final[dict] = {
+    sys.intern("Clarity Score"): "N/A",
+    sys.intern("Feedback"): "No feedback yet.",
+    sys.intern("Hallucination Risk"): "N/A",
+    sys.intern("Suggested Enhancements"): "No suggestions.",
+}
+
+# (prefix, result key) pairs checked with str.startswith against the start of each line.
+EVALUATION_FIELD_PREFIXES = tuple((f"{label}:", key) for label, key in EVALUATION_FIELD_KEYS.items())
+
+# Independent evaluation facets. Each one is a separate request, so the facets run in parallel
+# and each response is cached on its own: re-evaluating only misses on facets whose payload changed.
+# Every template asks for the labelled lines above, so responses share one parser.
+_EVALUATOR_ROLE = "You are an expert prompt evaluator. Analyze the following user prompt"
+EVALUATION_FACETS = {
+    "clarity": (
+        _EVALUATOR_ROLE + " for clarity and ambiguity.\n\n"
+        "User Prompt:\n---\n{prompt_text}\n---\n\n"
+        "Respond in exactly this format:\n"
+        "Clarity Score: [X/10]\n"
+        "Feedback: [Detailed points on ambiguity, areas for improvement]"
+    ),
+    "hallucination": (
+        _EVALUATOR_ROLE + " for its potential to make an LLM hallucinate.\n\n"
+        "User Prompt:\n---\n{prompt_text}\n---\n\n"
+        "Respond in exactly this format:\n"
+        "Potential Hallucination Risk: [Low/Medium/High] - [Reason]"
+    ),
+    "enhancements": (
+        _EVALUATOR_ROLE + " for alignment with common AI prompting best practices.\n\n"
+        "User Prompt:\n---\n{prompt_text}\n---\n\n"
+        "Respond in exactly this format:\n"
+        "Suggested Enhancements: [Specific actionable advice]"
+    ),
+}
+
+# Each template split once, at import time, around its {prompt_text} field. Building a payload
+# is then two concatenations rather than a str.format call that re-parses the template.
+EVALUATION_FACET_PARTS = {
+    facet: template.partition("{prompt_text}")[::2] for facet, template in EVALUATION_FACETS.items()
+}
+
+# Upper bound on how long the facet requests may take together (one shared deadline).
+EVALUATION_FACET_TIMEOUT_SECONDS = 30
 
 # ====================================================================================================
 # SECTION 2: CONCEPTUAL AI-DRIVEN EVALUATION LOGIC
 # These functions are stubs representing the complex AI logic that would be here.
 # ====================================================================================================
 
-# This function would send the prompt to Gemini (or another LLM)
-# with instructions to evaluate it based on various criteria.
+# Runs one facet request, consulting the response cache first. Called from worker threads,
+# so it must not touch any Streamlit UI or session state.
+def _generate_facet_response(model, model_name: str, payload: str, cache_policy: str, api_key_digest: bytes) -> str:
+    cache_key = _llm_cache.make_cache_key(payload, model_name, shared_utils.GEMINI_GENERATION_CONFIG)
+    cached_text = _llm_cache.get_cached_response(cache_key, cache_policy)
+    if cached_text is not None:
+        return cached_text
+    _llm_cache.ensure_live_call_allowed(cache_policy) # Raises CacheMiss under Replay.
+
+    def generate_facet() -> str:
+        with _ratelimit.acquire(api_key_digest, estimated_tokens=len(payload) // 4):
+            response = model.generate_content(payload)
+        return response.text if response else ""
+
+    response_text = _llm_cache.run_single_flight(cache_key, generate_facet, cache_policy, api_key_digest)
+    _llm_cache.store_response(cache_key, response_text, cache_policy)
+    return response_text
+
+# This function sends the prompt to Gemini (or another LLM) with instructions to
+# evaluate it on each facet in EVALUATION_FACETS.
 def conceptual_evaluate_prompt(prompt_text: str, model) -> dict:
     """
     (Conceptual) Sends a prompt to an AI model for evaluation.
-    This would involve a meta-prompt asking the AI to critique the user's prompt.
+    Each facet in EVALUATION_FACETS is a separate meta-prompt asking the AI to critique
+    one aspect of the user's prompt; the facets are requested in parallel.
 
     Args:
         prompt_text (str): The prompt to be evaluated.
@@ -54,64 +133,65 @@ def conceptual_evaluate_prompt(prompt_text: str, model) -> dict:
     if not model or not prompt_text.strip():
         return {} # Placeholder for actual evaluation logic.
 
-    # Example conceptual payload for evaluation
-    evaluation_payload = f"""
-    You are an expert prompt evaluator. Analyze the following user prompt for clarity,
-    potential for hallucination, and alignment with common AI best practices.
-    Provide a score (out of 10) for clarity, and detailed feedback for improvement.
-
-    User Prompt:
-    ---
-    {prompt_text}
-    ---
-
-    Provide your evaluation in a structured format:
-    Clarity Score: [X/10]
-    Feedback: [Detailed points on ambiguity, areas for improvement]
-    Potential Hallucination Risk: [Low/Medium/High] - [Reason]
-    Suggested Enhancements: [Specific actionable advice]
-    """
-    logger.info(f"Conceptual prompt evaluation payload created for: {prompt_text[:100]}...")
-
+    logger.info("Conceptual prompt evaluation payload created for: %.100s...", prompt_text)
+    model_name = getattr(model, "model_name", shared_utils.DEFAULT_GEMINI_MODEL)
+    # Read here: worker threads have no session state.
+    cache_policy = shared_utils.get_llm_cache_policy()
+    api_key_digest = shared_utils.get_api_key_digest()
+
+    # Wall-clock time is the slowest facet rather than the sum of all of them, and all facets
+    # share one deadline of EVALUATION_FACET_TIMEOUT_SECONDS.
+    # The executor is not used as a context manager: its exit would wait for a timed-out
+    # facet to finish, defeating the deadline.
+    facet_responses = []
+    executor = ThreadPoolExecutor(max_workers=len(EVALUATION_FACETS))
     try:
-        # In a real implementation, this would call model.generate_content(evaluation_payload)
-        # and parse the structured output.
-        # For now, it's just a placeholder simulation.
-        # Simulate an AI response for evaluation.
-        response_text = (
-            f"Clarity Score: 8/10\n"
-            f"Feedback: The prompt is generally clear but could benefit from more explicit constraints on output length. "
-            f"The goal is well-defined, but the desired style for numbers is ambiguous.\n"
-            f"Potential Hallucination Risk: Low - Task is factual, but complex numerical tasks always carry a small risk.\n"
-            f"Suggested Enhancements: Add a specific target word count (e.g., 'max 200 words'). Specify how numbers should be formatted (e.g., 'use comma separators')."
-        )
-        logger.info("Simulated AI prompt evaluation response.")
-        return parse_conceptual_evaluation_response(response_text)
-
-    except Exception as e:
-        logger.error(f"Conceptual evaluation failed: {e}", exc_info=True)
+        futures = {
+            facet: executor.submit(
+                _generate_facet_response, model, model_name, head + prompt_text + tail, cache_policy, api_key_digest
+            )
+            for facet, (head, tail) in EVALUATION_FACET_PARTS.items()
+        }
+        done, _ = wait(futures.values(), timeout=EVALUATION_FACET_TIMEOUT_SECONDS)
+        for facet, future in futures.items():
+            if future not in done:
+                logger.error("Evaluation facet '%s' timed out after %ds.", facet, EVALUATION_FACET_TIMEOUT_SECONDS)
+                continue
+            try:
+                facet_responses.append(future.result())
+            except Exception as e:
+                logger.error("Evaluation facet '%s' failed: %s", facet, e, exc_info=True)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if not any(facet_responses):
         return {}
+    logger.info("AI prompt evaluation responses received.")
+    # Facet responses use distinct labels, so they can be parsed together.
+    return parse_conceptual_evaluation_response("\n".join(facet_responses))
 
 def parse_conceptual_evaluation_response(raw_response: str) -> dict:
     """
     (Conceptual) Parses the raw text response from the AI evaluation into a structured dictionary.
     """
-    results = {
-        "Clarity Score": "N/A",
-        "Feedback": "No feedback yet.",
-        "Hallucination Risk": "N/A",
-        "Suggested Enhancements": "No suggestions.",
-    }
-    lines = raw_response.split('\n')
-    for line in lines:
-        if "Clarity Score:" in line:
-            results["Clarity Score"] = line.split("Clarity Score:")[1].strip()
-        elif "Feedback:" in line:
-            results["Feedback"] = line.split("Feedback:")[1].strip()
-        elif "Potential Hallucination Risk:" in line:
-            results["Hallucination Risk"] = line.split("Potential Hallucination Risk:")[1].strip()
-        elif "Suggested Enhancements:" in line:
-            results["Suggested Enhancements"] = line.split("Suggested Enhancements:")[1].strip()
+    results = dict(EVALUATION_RESULT_DEFAULTS)
+    # A field's value runs until the next labelled line, so multi-line feedback is kept whole.
+    current_key = None
+    current_lines = []
+    for line in raw_response.splitlines():
+        stripped_line = line.lstrip()
+        for prefix, key in EVALUATION_FIELD_PREFIXES:
+            if stripped_line.startswith(prefix):
+                if current_key is not None:
+                    results[current_key] = "\n".join(current_lines).strip()
+                current_key = key
+                current_lines = [stripped_line[len(prefix):]]
+                break
+        else:
+            if current_key is not None:
+                current_lines.append(line)
+    if current_key is not None:
+        results[current_key] = "\n".join(current_lines).strip()
     return results
 
 # ====================================================================================================
@@ -119,7 +199,7 @@ def parse_conceptual_evaluation_response(raw_response: str) -> dict:
 # This section defines the user interface for the AI Prompt Evaluator module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def run():
     """
     Main function to run the AI Prompt Evaluator module's Streamlit UI.
     This function is called by app.py when the 'AI Prompt Evaluator' module is selected.
@@ -143,7 +223,10 @@ def run(api_key_valid: bool):
         placeholder="Type the prompt you want to evaluate here...",
         key="pe_prompt_input"
     )
-    st.session_state["pe_prompt_to_evaluate"] = prompt_to_evaluate
+    # Mirror into the persisted key (only on change), since Streamlit drops the widget's own
+    # state while another module is shown.
+    if prompt_to_evaluate != st.session_state.get("pe_prompt_to_evaluate"):
+        st.session_state["pe_prompt_to_evaluate"] = prompt_to_evaluate
 
     evaluate_button_clicked = st.button("📊 Simulate Evaluation", use_container_width=True, key="pe_evaluate_button")
 
@@ -5,7 +5,9 @@
 
 import streamlit as st
 import logging
-import json # For JSON formatting
+import sys # For interning static text constants
+from typing import Final
+import functools # For building the API request template on first use
 from modules import shared_utils # Import shared utility functions
 
 logger = logging.getLogger(__name__)
@@ -15,7 +17,7 @@ logger = logging.getLogger(__name__)
 # Defines formats and help messages.
 # ====================================================================================================
 
-FORMATTER_HELP_MESSAGE = """
+FORMATTER_HELP_MESSAGE: Final[str] = sys.intern("""
 ### Format Your Prompts for Any Use Case! (Coming Soon!)
 This module will help you transform your prompts into the perfect format.
 **Envisioned Features:**
@@ -30,22 +32,81 @@ This module will help you transform your prompts into the perfect format.
 * **Auto-format for Chatbot Dev:** Specific formats for chatbot frameworks.
 
 Get ready to streamline your prompt integration!
-"""
+""")
 
-FORMAT_OPTIONS = [
+FORMAT_OPTIONS = (
     "Plaintext",
     "Markdown",
     "JSON (basic)",
     "API-compatible (conceptual)",
     "Slack-friendly (conceptual)",
     "Code Comment (conceptual)"
-]
+)
+FORMAT_OPTION_INDEX = {format_option: i for i, format_option in enumerate(FORMAT_OPTIONS)}
 
 # ====================================================================================================
 # SECTION 2: CONCEPTUAL FORMATTING LOGIC
 # These functions represent how prompts would be transformed.
 # ====================================================================================================
 
+# 2.1 Per-format transformations
+# Each formatter takes the prompt and the format-specific keyword arguments and returns a str.
+def _format_plaintext(original_prompt: str, format_kwargs: dict) -> str:
+    return original_prompt # No change
+
+def _format_markdown(original_prompt: str, format_kwargs: dict) -> str:
+    # Simple Markdown formatting
+    return f"```\n{original_prompt}\n```"
+
+def _format_json(original_prompt: str, format_kwargs: dict) -> str:
+    import json # Deferred: only the JSON-based formats need it.
+    try:
+        # Simple JSON encapsulation, assuming prompt is just a string
+        return json.dumps({"prompt": original_prompt, "format_applied": "JSON"}, indent=2)
+    except Exception as e:
+        logger.error("Error converting to JSON: %s", e)
+        return f"Error converting to JSON. Prompt:\n{original_prompt}"
+
+# The API request skeleton is serialized once, on first use; each call only splices in the
+# JSON-escaped prompt.
+_API_PROMPT_PLACEHOLDER = "__PROMPT_TEXT__"
+
+@functools.lru_cache(maxsize=1)
+def _api_request_template() -> str:
+    import json # Deferred: only the JSON-based formats need it.
+    return json.dumps(
+        {"contents": [{"role": "user", "parts": [{"text": _API_PROMPT_PLACEHOLDER}]}]},
+        indent=2
+    )
+
+def _format_api_compatible(original_prompt: str, format_kwargs: dict) -> str:
+    import json # Deferred: only the JSON-based formats need it.
+    return _api_request_template().replace(json.dumps(_API_PROMPT_PLACEHOLDER), json.dumps(original_prompt), 1)
+
+def _format_slack(original_prompt: str, format_kwargs: dict) -> str:
+    return f"```\n{original_prompt}\n```\n_Send this to your favorite AI bot!_"
+
+def _format_code_comment(original_prompt: str, format_kwargs: dict) -> str:
+    comment_style = format_kwargs.get("comment_style", "#")
+    line_prefix = f"{comment_style} "
+    # splitlines() also handles "\r\n" pasted from Windows editors.
+    body = "\n".join(line_prefix + line for line in original_prompt.splitlines())
+    return f"{comment_style} --- START AI PROMPT ---\n{body}\n{comment_style} --- END AI PROMPT ---"
+
+def _format_unsupported(target_format: str, original_prompt: str) -> str:
+    return f"Unsupported format: {target_format}\nOriginal Prompt:\n{original_prompt}"
+
+# 2.2 Dispatch table keyed by the FORMAT_OPTIONS labels
+FORMATTERS = {
+    "Plaintext": _format_plaintext,
+    "Markdown": _format_markdown,
+    "JSON (basic)": _format_json,
+    "API-compatible (conceptual)": _format_api_compatible,
+    "Slack-friendly (conceptual)": _format_slack,
+    "Code Comment (conceptual)": _format_code_comment,
+}
+
+# 2.3 Public entry point
 def apply_format_transformation(original_prompt: str, target_format: str, **kwargs) -> str:
     """
     (Conceptual) Applies the chosen formatting transformation to the prompt.
@@ -61,52 +122,33 @@ def apply_format_transformation(original_prompt: str, target_format: str, **kwar
     if not original_prompt.strip():
         return ""
 
-    formatted_output = ""
-    logger.info(f"Applying conceptual format '{target_format}' to prompt.")
-
-    if target_format == "Plaintext":
-        formatted_output = original_prompt # No change
-    elif target_format == "Markdown":
-        # Simple Markdown formatting
-        formatted_output = f"```\n{original_prompt}\n```"
-    elif target_format == "JSON (basic)":
-        try:
-            # Simple JSON encapsulation, assuming prompt is just a string
-            formatted_output = json.dumps({"prompt": original_prompt, "format_applied": "JSON"}, indent=2)
-        except Exception as e:
-            logger.error(f"Error converting to JSON: {e}")
-            formatted_output = f"Error converting to JSON. Prompt:\n{original_prompt}"
-    elif target_format == "API-compatible (conceptual)":
-        # FIX: Using json.dumps for the prompt content to handle escaping correctly
-        formatted_output = (
-            "{\n"
-            '  "contents": [\n'
-            '    {\n'
-            '      "role": "user",\n'
-            f'      "parts": [ {{ "text": {json.dumps(original_prompt)} }} ]\n' # Corrected line
-            '    }\n'
-            '  ]\n'
-            '}'
-        )
-    elif target_format == "Slack-friendly (conceptual)":
-        formatted_output = f"```\n{original_prompt}\n```\n_Send this to your favorite AI bot!_"
-    elif target_format == "Code Comment (conceptual)":
-        comment_style = kwargs.get("comment_style", "#")
-        lines = original_prompt.split('\n')
-        formatted_output = f"{comment_style} --- START AI PROMPT ---\n"
-        formatted_output += "\n".join([f"{comment_style} {line}" for line in lines])
-        formatted_output += f"\n{comment_style} --- END AI PROMPT ---"
-    else:
-        formatted_output = f"Unsupported format: {target_format}\nOriginal Prompt:\n{original_prompt}"
+    logger.info("Applying conceptual format '%s' to prompt.", target_format)
 
-    return formatted_output
+    formatter = FORMATTERS.get(target_format)
+    if formatter is None:
+        return _format_unsupported(target_format, original_prompt)
+    return formatter(original_prompt, kwargs)
 
 # ====================================================================================================
 # SECTION 3: STREAMLIT UI LAYOUT AND INTERACTION
 # This section defines the user interface for the Prompt Formatter module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+# Widget keys that carry their own value and must be dropped for Clear to take effect.
+PF_WIDGET_STATE_KEYS = ("pf_original_prompt_input", "pf_format_select", "pf_comment_style")
+
+def _clear_formatter_state():
+    """
+    on_click callback for the Clear button. Callbacks run before the script reruns, so the
+    widgets are created with the reset values and no extra rerun is needed.
+    """
+    st.session_state["pf_original_prompt"] = ""
+    st.session_state["pf_formatted_output"] = ""
+    st.session_state["pf_selected_format"] = "Plaintext"
+    for widget_key in PF_WIDGET_STATE_KEYS:
+        st.session_state.pop(widget_key, None)
+
+def run():
     """
     Main function to run the Prompt Formatter module's Streamlit UI.
     This function is called by app.py when the 'Prompt Formatter' module is selected.
@@ -129,12 +171,14 @@ def run(api_key_valid: bool):
         placeholder="Enter your prompt here...",
         key="pf_original_prompt_input"
     )
-    st.session_state["pf_original_prompt"] = original_prompt
+    # Mirror into the persisted key (only on change), since Streamlit drops the widget's own
+    # state while another module is shown.
+    if original_prompt != st.session_state.get("pf_original_prompt"):
+        st.session_state["pf_original_prompt"] = original_prompt
 
     # Select desired format
     st.subheader("🔗 Select Output Format")
-    selected_format_index = FORMAT_OPTIONS.index(st.session_state.get("pf_selected_format", "Plaintext")) \
-        if st.session_state.get("pf_selected_format", "Plaintext") in FORMAT_OPTIONS else 0
+    selected_format_index = FORMAT_OPTION_INDEX.get(st.session_state.get("pf_selected_format", "Plaintext"), 0)
     selected_format = st.selectbox(
         "Choose the format:",
         options=FORMAT_OPTIONS,
@@ -142,7 +186,8 @@ def run(api_key_valid: bool):
         key="pf_format_select",
         help="Select the desired output format for your prompt."
     )
-    st.session_state["pf_selected_format"] = selected_format
+    if selected_format != st.session_state.get("pf_selected_format"):
+        st.session_state["pf_selected_format"] = selected_format
 
     # Additional options for specific formats (conceptual)
     if selected_format == "Code Comment (conceptual)":
@@ -152,7 +197,6 @@ def run(api_key_valid: bool):
             key="pf_comment_style",
             help="Select the programming language comment style."
         )
-        st.session_state["pf_comment_style"] = comment_style
         format_kwargs = {"comment_style": comment_style}
     else:
         format_kwargs = {}
@@ -163,51 +207,37 @@ def run(api_key_valid: bool):
     with col_format:
         format_button_clicked = st.button("✨ Apply Formatting", use_container_width=True, key="pf_format_button")
     with col_clear:
-        clear_button_clicked = st.button(
+        st.button(
             "🗑️ Clear",
             use_container_width=True,
             key="pf_clear_button",
-            help="Clear all inputs and formatted output."
+            help="Clear all inputs and formatted output.",
+            on_click=_clear_formatter_state
         )
 
-    # Handle clear button click
-    if clear_button_clicked:
-        st.session_state["pf_original_prompt"] = ""
-        st.session_state["pf_formatted_output"] = ""
-        st.session_state["pf_selected_format"] = "Plaintext"
-        st.session_state["pf_comment_style"] = "#" # Reset default for comment style
-        st.experimental_rerun()
+    # Logic for formatting
+    # Handled before the output area is drawn, so the new result shows up in this same run.
+    if format_button_clicked:
+        if not original_prompt.strip():
+            st.error("Please enter a prompt to format.")
+        else:
+            logger.info("Formatting prompt to '%s'.", selected_format)
+            formatted_text = apply_format_transformation(original_prompt, selected_format, **format_kwargs)
+            st.session_state["pf_formatted_output"] = formatted_text
+            st.success(f"Prompt successfully formatted to {selected_format}!")
 
     # Output display area
     st.subheader("➡️ Formatted Prompt Output")
     if "pf_formatted_output" not in st.session_state:
         st.session_state["pf_formatted_output"] = "The formatted prompt will appear here."
 
-    formatted_output_display = st.text_area(
-        "Formatted Prompt:",
-        value=st.session_state["pf_formatted_output"],
-        height=300,
-        key="pf_formatted_output_area",
-        disabled=True
-    )
-
     if st.session_state["pf_formatted_output"] and st.session_state["pf_formatted_output"] != "The formatted prompt will appear here.":
-        shared_utils.add_copy_to_clipboard_button(st.session_state["pf_formatted_output"], shared_utils.MSG_COPY_BUTTON)
+        # The copy block is the display of the formatted prompt.
+        shared_utils.add_copy_to_clipboard_button(st.session_state["pf_formatted_output"])
         st.info("The prompt has been formatted. Copy it or select a different format.")
     else:
+        st.caption("The formatted prompt will appear here.")
         st.info("Enter a prompt and select a format to get started.")
 
-    # Logic for formatting
-    if format_button_clicked:
-        if not original_prompt.strip():
-            st.error("Please enter a prompt to format.")
-            return
-
-        logger.info(f"Formatting prompt to '{selected_format}'.")
-        formatted_text = apply_format_transformation(original_prompt, selected_format, **format_kwargs)
-        st.session_state["pf_formatted_output"] = formatted_text
-        st.success(f"Prompt successfully formatted to {selected_format}!")
-        st.experimental_rerun()
-
     shared_utils.display_ai_powered_notice()
     logger.info("Prompt Formatter module UI rendered (conceptual).")
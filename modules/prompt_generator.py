@@ -5,7 +5,13 @@
 
 import streamlit as st
 import logging
+import functools # For memoizing the settings-dependent payload tail
+from concurrent.futures import ThreadPoolExecutor, wait # For dispatching variant requests together
+from typing import Final
 from modules import shared_utils # Import shared utility functions
+from modules import _llm_cache # Exact-match response cache for Gemini calls
+from modules import _semantic_cache # Similarity cache for near-duplicate tasks
+from modules import _ratelimit # Token-bucket pacing for Gemini calls
 
 logger = logging.getLogger(__name__)
 
@@ -16,32 +22,54 @@ logger = logging.getLogger(__name__)
 
 # 1.1 Prompt Customization Options
 # Tones for the AI's response.
-PROMPT_GENERATOR_TONES = [
+PROMPT_GENERATOR_TONES = (
     "Neutral", "Professional", "Friendly", "Formal", "Informal", "Persuasive",
     "Enthusiastic", "Empathetic", "Direct", "Concise", "Creative", "Humorous",
     "Sarcastic", "Informative", "Technical", "Casual", "Authoritative",
     "Urgent", "Calm", "Motivational", "Reflective", "Narrative", "Poetic",
     "Journalistic", "Academic", "Playful", "Skeptical", "Optimistic", "Pessimistic",
     "Inspiring", "Instructive", "Declarative", "Questioning", "Rhetorical"
-]
+)
 
 # Formats for the AI's response.
-PROMPT_GENERATOR_FORMATS = [
+PROMPT_GENERATOR_FORMATS = (
     "Paragraph", "Bullet Points", "Numbered List", "Short Answer", "Long Essay",
     "Code Snippet", "Poem", "Email", "Blog Post", "News Article", "Summary",
     "Dialogue", "Table", "JSON", "Markdown", "User Story", "Headline", "Review",
     "Script", "Instructions", "Recipe", "Outline", "Description", "Speech",
     "Memo", "Report", "Press Release", "Case Study", "FAQ", "Glossary",
     "Ad Copy", "Social Media Post", "Interview Questions", "Lesson Plan"
-]
+)
 
 # Complexity levels for the generated prompt, influencing the AI's response style.
-PROMPT_COMPLEXITY_LEVELS = [
+PROMPT_COMPLEXITY_LEVELS = (
     "Beginner (Simple & Direct)",
     "Intermediate (Detailed & Clear)",
     "Advanced (Nuanced & Strategic)",
     "Expert (Highly Specific & Context-Aware)"
-]
+)
+
+# Persisted input values, seeded once per session. Widget state is dropped while another module
+# is shown, so each input widget is re-seeded from these keys (see PG_WIDGET_STATE_KEYS).
+PG_SESSION_DEFAULTS = {
+    "pg_user_task": "",
+    "pg_selected_tone": "Neutral",
+    "pg_selected_format": "Paragraph",
+    "pg_word_limit": 500,
+    "pg_selected_complexity": "Intermediate (Detailed & Clear)",
+}
+
+# Input widget key -> the persisted key it is seeded from and written back to.
+PG_WIDGET_STATE_KEYS = {
+    "pg_user_task_input": "pg_user_task",
+    "pg_tone_select": "pg_selected_tone",
+    "pg_format_select": "pg_selected_format",
+    "pg_word_limit_slider": "pg_word_limit",
+    "pg_complexity_select": "pg_selected_complexity",
+}
+
+# Session-state values applied by the Clear button.
+PG_CLEAR_STATE = {**PG_SESSION_DEFAULTS, "pg_generated_prompt": ""}
 
 # 1.2 Initial Help Message for the Prompt Generator Module
 PROMPT_GENERATOR_HELP_MESSAGE = """
@@ -53,6 +81,51 @@ Use this module to engineer highly effective prompts for any AI task.
 4.  **Generate:** Click 'Generate Prompt' to get your optimized AI instruction!
 """
 
+# 1.3 Static Meta-Prompt Prefix
+# The invariant part of every prompt-engineering request. It is emitted first and never
+# interpolated, so consecutive requests share the longest possible prefix and benefit from
+# Gemini's prefix caching. All user-specific fields are appended after it.
+_STATIC_PROMPT_PREFIX: Final[str] = (
+    "You are an expert AI prompt engineer specialized in creating highly effective, clear, "
+    "and comprehensive prompts for large language models (LLMs) like Gemini. "
+    "Your goal is to transform a user's raw task into a perfectly optimized LLM prompt. "
+    "The generated prompt should leave no ambiguity for the LLM and guide it to produce "
+    "the exact desired output, adhering to all specified constraints and nuances. "
+    "The final output should be ONLY the engineered prompt itself, without any conversational "
+    "introductions or explanations from you (e.g., 'Here's your prompt:')."
+    "\n"
+    "\n**Instructions for Generating the Engineered Prompt:**\n"
+    "- The prompt should be self-contained and ready to be directly copied and pasted into an LLM.\n"
+    "- It must clearly instruct the LLM on its role (if any), the task, the tone, the format, "
+    "and any constraints (like word count).\n"
+    "- For example, if the tone is 'Creative' and format is 'Poem', the prompt should say "
+    "'Write a creative poem...' or similar.\n"
+    "- Ensure the engineered prompt is concise yet comprehensive.\n"
+    "- Do not include example LLM outputs, only the prompt itself.\n"
+)
+
+# 1.4 Variable Meta-Prompt Templates
+# The task header is fixed; the settings tail depends only on the UI selections, so it is
+# rendered once per combination of settings (see `_render_settings_tail`) and reused.
+_TASK_HEADER: Final[str] = _STATIC_PROMPT_PREFIX + "\n**User's Core Task/Goal:**\n"
+_SETTINGS_TAIL_TEMPLATE: Final[str] = (
+    "\n\n"
+    "**Desired Tone for LLM's Response:** `{tone}`\n\n"
+    "**Desired Output Format for LLM's Response:** `{output_format}`\n\n"
+    "**Word Count Limit for LLM's Response:** Approximately `{word_limit}` words.\n\n"
+    "**Complexity Level of the Engineered Prompt:** `{complexity}`\n"
+)
+_REWRITE_TAIL_TEMPLATE: Final[str] = (
+    "\n**Specific Rewriting Instruction:** `{rewrite_instruction}`\n\n"
+    "Focus solely on rewriting the provided prompt based on this instruction, "
+    "maintaining all other previous parameters (tone, format, word limit, complexity)."
+)
+
+# 1.5 Variant Generation Limits
+# Maximum number of tone variants per batch, and how long the batch waits for each variant.
+MAX_PROMPT_VARIANTS = 5
+PROMPT_VARIANT_TIMEOUT_SECONDS = 60
+
 # ====================================================================================================
 # SECTION 2: AI PROMPT CONSTRUCTION LOGIC
 # Functions responsible for assembling the prompt that is sent to the Gemini AI.
@@ -83,40 +156,32 @@ def construct_internal_gemini_payload_for_prompt_generation(
         str: The complete prompt string to send to Gemini for prompt engineering.
     """
     logger.info("Constructing internal Gemini payload for prompt generation.")
-    prompt_parts = [
-        "You are an expert AI prompt engineer specialized in creating highly effective, clear, "
-        "and comprehensive prompts for large language models (LLMs) like Gemini. "
-        "Your goal is to transform a user's raw task into a perfectly optimized LLM prompt. "
-        "The generated prompt should leave no ambiguity for the LLM and guide it to produce "
-        "the exact desired output, adhering to all specified constraints and nuances. "
-        "The final output should be ONLY the engineered prompt itself, without any conversational "
-        "introductions or explanations from you (e.g., 'Here's your prompt:')."
-    ]
-
-    # Add specifics for the prompt engineering task
-    prompt_parts.append(f"\n**User's Core Task/Goal:**\n{user_task}\n")
-    prompt_parts.append(f"**Desired Tone for LLM's Response:** `{tone}`\n")
-    prompt_parts.append(f"**Desired Output Format for LLM's Response:** `{output_format}`\n")
-    prompt_parts.append(f"**Word Count Limit for LLM's Response:** Approximately `{word_limit}` words.\n")
-    prompt_parts.append(f"**Complexity Level of the Engineered Prompt:** `{complexity}`\n")
+    return _TASK_HEADER + user_task + _render_settings_tail(
+        tone, output_format, word_limit, complexity, rewrite_instruction
+    )
 
+# Memoized per combination of settings: within a session users mostly edit the task while the
+# selections stay fixed, so each request then only concatenates the task into cached pieces.
+@functools.lru_cache(maxsize=64)
+def _render_settings_tail(
+    tone: str,
+    output_format: str,
+    word_limit: int,
+    complexity: str,
+    rewrite_instruction: str = None
+) -> str:
+    """
+    Renders the settings-dependent part of the meta-prompt that follows the user's task.
+    """
+    settings_tail = _SETTINGS_TAIL_TEMPLATE.format(
+        tone=tone,
+        output_format=output_format,
+        word_limit=word_limit,
+        complexity=complexity
+    )
     if rewrite_instruction:
-        prompt_parts.append(f"**Specific Rewriting Instruction:** `{rewrite_instruction}`\n")
-        prompt_parts.append("Focus solely on rewriting the provided prompt based on this instruction, "
-                            "maintaining all other previous parameters (tone, format, word limit, complexity).")
-    else:
-        prompt_parts.append(
-            "\n**Instructions for Generating the Engineered Prompt:**\n"
-            "- The prompt should be self-contained and ready to be directly copied and pasted into an LLM.\n"
-            "- It must clearly instruct the LLM on its role (if any), the task, the tone, the format, "
-            "and any constraints (like word count).\n"
-            "- For example, if the tone is 'Creative' and format is 'Poem', the prompt should say "
-            "'Write a creative poem...' or similar.\n"
-            "- Ensure the engineered prompt is concise yet comprehensive.\n"
-            "- Do not include example LLM outputs, only the prompt itself."
-        )
-
-    return "\n".join(prompt_parts)
+        settings_tail += _REWRITE_TAIL_TEMPLATE.format(rewrite_instruction=rewrite_instruction)
+    return settings_tail
 
 def generate_engineered_prompt_with_gemini(
     api_key_valid: bool,
@@ -145,198 +210,310 @@ def generate_engineered_prompt_with_gemini(
     if not shared_utils.check_api_key_status(api_key_valid):
         return "" # Return empty string, as error message is already displayed.
 
-    if not user_task.strip():
+    # Surrounding whitespace never changes the request, so it is dropped before the payload
+    # (and with it the exact-match cache key) is built.
+    user_task = user_task.strip()
+    if not user_task:
         st.error(shared_utils.MSG_TASK_MISSING)
         logger.warning("Prompt generation aborted: User task is empty.")
         return ""
 
+    # Construct the payload for the Gemini API.
+    full_gemini_payload = construct_internal_gemini_payload_for_prompt_generation(
+        user_task, tone, output_format, word_limit, complexity, rewrite_instruction
+    )
+
+    # Serve identical requests from the response cache without calling the API.
+    model_name = st.session_state.get("selected_gemini_model", shared_utils.DEFAULT_GEMINI_MODEL)
+    cache_key = _llm_cache.make_cache_key(full_gemini_payload, model_name, shared_utils.GEMINI_GENERATION_CONFIG)
+    cache_policy = shared_utils.get_llm_cache_policy()
+    cached_text = _llm_cache.get_cached_response(cache_key, cache_policy)
+    if cached_text is not None:
+        logger.info("Engineered prompt served from the response cache.")
+        return cached_text
+    try:
+        _llm_cache.ensure_live_call_allowed(cache_policy)
+    except _llm_cache.CacheMiss as e:
+        st.error(f"{e} Switch the LLM cache policy in the sidebar to call Gemini.")
+        logger.info("Prompt generation skipped: %s", e)
+        return ""
+
     model = shared_utils.get_gemini_model(st.session_state["gemini_api_key"])
     if model is None:
         st.error(shared_utils.MSG_GENERATION_FAILED + " (Gemini model not initialized.)")
         logger.error("Prompt generation aborted: Gemini model failed to initialize.")
         return ""
 
-    # Construct the payload for the Gemini API.
-    full_gemini_payload = construct_internal_gemini_payload_for_prompt_generation(
-        user_task, tone, output_format, word_limit, complexity, rewrite_instruction
+    # When opted in, near-duplicate tasks with identical settings are served from the semantic
+    # cache. The namespace includes the API key digest, so entries are never shared across users,
+    # and the static prefix, so editing the meta-prompt invalidates hits.
+    api_key_digest = shared_utils.get_api_key_digest()
+    semantic_enabled = st.session_state.get(_semantic_cache.SEMANTIC_CACHE_ENABLED_KEY, False)
+    semantic_namespace = _semantic_cache.make_namespace(
+        api_key_digest.hex(),
+        _STATIC_PROMPT_PREFIX, model_name, tone, output_format, word_limit, complexity, rewrite_instruction or ""
     )
-    logger.debug(f"Sending payload to Gemini: {full_gemini_payload[:500]}...") # Log first 500 chars
+    similar_text = None
+    if semantic_enabled and cache_policy in _llm_cache.READ_POLICIES:
+        similar_text = _semantic_cache.lookup(
+            semantic_namespace,
+            user_task,
+            api_key_digest,
+            st.session_state.get("semantic_cache_threshold", _semantic_cache.SEMANTIC_CACHE_DEFAULT_THRESHOLD)
+        )
+    if similar_text is not None:
+        logger.info("Engineered prompt served from the semantic cache.")
+        return similar_text
+
+    logger.debug("Sending payload to Gemini: %.500s...", full_gemini_payload) # Log first 500 chars
 
     try:
         with st.spinner(shared_utils.MSG_LOADING_AI):
-            response = model.generate_content(full_gemini_payload)
-            if response and response.text:
+            response = None
+
+            def generate_streamed() -> str:
+                # Stream the response so the first tokens are shown as soon as they arrive.
+                nonlocal response
+                with _ratelimit.acquire(api_key_digest, estimated_tokens=len(full_gemini_payload) // 4):
+                    response = model.generate_content(full_gemini_payload, stream=True)
+                stream_placeholder = st.empty()
+                try:
+                    with stream_placeholder.container():
+                        return st.write_stream(shared_utils.iter_response_text(response)) or ""
+                finally:
+                    # The caller renders the final text; drop the progressive copy.
+                    stream_placeholder.empty()
+
+            # An identical request already in flight (double-click, second tab) is awaited
+            # instead of being sent to the API again.
+            generated_text = _llm_cache.run_single_flight(cache_key, generate_streamed, cache_policy, api_key_digest)
+            if generated_text:
                 logger.info("Prompt successfully generated by Gemini.")
-                return response.text
+                _llm_cache.store_response(cache_key, generated_text, cache_policy)
+                if semantic_enabled and cache_policy in _llm_cache.WRITE_POLICIES:
+                    _semantic_cache.store(semantic_namespace, user_task, generated_text, api_key_digest)
+                return generated_text
             else:
                 error_detail = "No text content in response."
                 if hasattr(response, 'prompt_feedback') and response.prompt_feedback:
                     error_detail += f" Prompt feedback: {response.prompt_feedback}"
                 if hasattr(response, 'candidates') and not response.candidates:
                     error_detail += " No candidates generated (potentially blocked by safety settings)."
-                logger.error(f"Gemini response empty or invalid: {error_detail}")
+                logger.error("Gemini response empty or invalid: %s", error_detail)
                 st.error(shared_utils.MSG_GENERATION_FAILED + f" (Details: {error_detail})")
                 return ""
     except Exception as e:
-        logger.error(f"Error during Gemini API call for prompt generation: {e}", exc_info=True)
+        logger.error("Error during Gemini API call for prompt generation: %s", e, exc_info=True)
         st.error(shared_utils.MSG_GENERATION_FAILED + f" (API Error: {e})")
         return ""
 
+def _generate_variant_response(model, model_name: str, payload: str, cache_policy: str, api_key_digest: bytes) -> str:
+    """
+    Generates one variant without streaming, going through the response cache, the in-flight
+    de-duplication and the rate limiter. Runs on a worker thread, so it never touches session state.
+    """
+    cache_key = _llm_cache.make_cache_key(payload, model_name, shared_utils.GEMINI_GENERATION_CONFIG)
+    cached_text = _llm_cache.get_cached_response(cache_key, cache_policy)
+    if cached_text is not None:
+        return cached_text
+    _llm_cache.ensure_live_call_allowed(cache_policy) # Raises CacheMiss under Replay.
+
+    def generate_variant() -> str:
+        with _ratelimit.acquire(api_key_digest, estimated_tokens=len(payload) // 4):
+            response = model.generate_content(payload)
+        return response.text if response else ""
+
+    response_text = _llm_cache.run_single_flight(cache_key, generate_variant, cache_policy, api_key_digest)
+    _llm_cache.store_response(cache_key, response_text, cache_policy)
+    return response_text
+
+def generate_engineered_prompts_batch(api_key_valid: bool, requests: list) -> list:
+    """
+    Generates several engineered prompts in one batch, e.g. the same task at different tones.
+    All requests are dispatched together and share one deadline of
+    PROMPT_VARIANT_TIMEOUT_SECONDS, so the batch takes as long as its slowest request
+    (at most the timeout) rather than the sum of all of them.
+
+    Args:
+        api_key_valid (bool): Flag indicating if the Gemini API key is valid.
+        requests (list): Dicts with the keyword arguments of
+            `construct_internal_gemini_payload_for_prompt_generation`.
+
+    Returns:
+        list: The generated prompts in request order; failed requests yield an empty string.
+    """
+    if not shared_utils.check_api_key_status(api_key_valid) or not requests:
+        return []
+
+    model = shared_utils.get_gemini_model(st.session_state["gemini_api_key"])
+    if model is None:
+        st.error(shared_utils.MSG_GENERATION_FAILED + " (Gemini model not initialized.)")
+        logger.error("Variant generation aborted: Gemini model failed to initialize.")
+        return []
+
+    # Read on the script thread: worker threads have no session state.
+    model_name = st.session_state.get("selected_gemini_model", shared_utils.DEFAULT_GEMINI_MODEL)
+    cache_policy = shared_utils.get_llm_cache_policy()
+    api_key_digest = shared_utils.get_api_key_digest()
+    payloads = [construct_internal_gemini_payload_for_prompt_generation(**request) for request in requests]
+    logger.info("Dispatching a batch of %d prompt generation requests.", len(payloads))
+
+    results = []
+    cache_miss = None
+    executor = ThreadPoolExecutor(max_workers=len(payloads))
+    try:
+        futures = [
+            executor.submit(_generate_variant_response, model, model_name, payload, cache_policy, api_key_digest)
+            for payload in payloads
+        ]
+        # One deadline for the whole batch, not one timeout per request in turn.
+        done, _ = wait(futures, timeout=PROMPT_VARIANT_TIMEOUT_SECONDS)
+        for i, future in enumerate(futures):
+            if future not in done:
+                logger.error("Batch request %d timed out after %ds.", i, PROMPT_VARIANT_TIMEOUT_SECONDS)
+                results.append("")
+                continue
+            try:
+                results.append(future.result())
+            except _llm_cache.CacheMiss as e:
+                cache_miss = e
+                results.append("")
+            except Exception as e:
+                logger.error("Batch request %d failed: %s", i, e, exc_info=True)
+                results.append("")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if cache_miss is not None:
+        st.error(f"{cache_miss} Switch the LLM cache policy in the sidebar to call Gemini.")
+        logger.info("Some variants skipped: %s", cache_miss)
+    return results
+
 # ====================================================================================================
 # SECTION 3: STREAMLIT UI LAYOUT AND INTERACTION
 # This section defines the user interface for the Prompt Generator module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def _clear_generator_state():
+    """
+    on_click callback for the Clear button. Callbacks run before the script reruns, so the
+    widgets are created with the reset values and no extra rerun is needed.
+    """
+    st.session_state.update({**PG_CLEAR_STATE, "pg_variants": []})
+    for widget_key in PG_WIDGET_STATE_KEYS:
+        st.session_state.pop(widget_key, None)
+
+def run():
     """
     Main function to run the Prompt Generator module's Streamlit UI.
     This function is called by app.py when the 'Prompt Generator' module is selected.
     """
+    api_key_valid = shared_utils.is_api_key_valid()
+
     st.header("🎯 Prompt Generator")
     st.markdown("Craft precise and effective prompts for your AI tasks.")
     st.markdown("---")
 
+    # Seed the persisted values, then each input widget's own key from them. The widgets are
+    # key-bound, so no value=/index= has to be resolved on every rerun.
+    shared_utils.seed_session_defaults(PG_SESSION_DEFAULTS)
+    session_state = st.session_state
+    for widget_key, state_key in PG_WIDGET_STATE_KEYS.items():
+        if widget_key not in session_state:
+            session_state[widget_key] = session_state[state_key]
+
     # Display initial help message if the user hasn't interacted much.
     if st.session_state.get("generated_prompt", "") == "":
         shared_utils.display_module_help(PROMPT_GENERATOR_HELP_MESSAGE)
 
-    # 3.1 User Task Input
-    st.subheader("📝 Define Your Task/Goal")
-    user_task = st.text_area(
-        "What do you want the AI to do? Be detailed and specific:",
-        value=st.session_state.get("pg_user_task", ""), # 'pg_' prefix for Prompt Generator module state
-        height=180,
-        placeholder="E.g., Write a compelling blog post about the benefits of quantum computing for small businesses.",
-        help="Describe the core task, any specific requirements, or background information.",
-        key="pg_user_task_input"
-    )
-    st.session_state["pg_user_task"] = user_task # Persist in session state.
-
-    st.markdown("---")
-
-    # 3.2 Prompt Customization Options
-    st.subheader("✨ Customize Your Prompt")
-    col1, col2 = st.columns(2)
-
-    with col1:
-        # Tone Selection
-        selected_tone_index = PROMPT_GENERATOR_TONES.index(st.session_state.get("pg_selected_tone", "Neutral")) \
-            if st.session_state.get("pg_selected_tone", "Neutral") in PROMPT_GENERATOR_TONES else 0
-        selected_tone = st.selectbox(
-            "Desired Tone for AI's Response:",
-            options=PROMPT_GENERATOR_TONES,
-            index=selected_tone_index,
-            key="pg_tone_select",
-            help="Influences the emotional quality and style of the AI's output (e.g., 'Formal', 'Creative', 'Humorous')."
+    # 3.1 - 3.3 Task, Customization and Action Buttons
+    # The inputs live in a form, so editing the task or moving a slider does not rerun the
+    # script; the values are submitted together when Generate (or Clear) is clicked.
+    with st.form("pg_form"):
+        # 3.1 User Task Input
+        st.subheader("📝 Define Your Task/Goal")
+        user_task = st.text_area(
+            "What do you want the AI to do? Be detailed and specific:",
+            height=180,
+            placeholder="E.g., Write a compelling blog post about the benefits of quantum computing for small businesses.",
+            help="Describe the core task, any specific requirements, or background information.",
+            key="pg_user_task_input" # 'pg_' prefix for Prompt Generator module state
         )
-        st.session_state["pg_selected_tone"] = selected_tone
-
-    with col2:
-        # Format Selection
-        selected_format_index = PROMPT_GENERATOR_FORMATS.index(st.session_state.get("pg_selected_format", "Paragraph")) \
-            if st.session_state.get("pg_selected_format", "Paragraph") in PROMPT_GENERATOR_FORMATS else 0
-        selected_format = st.selectbox(
-            "Desired Output Format for AI's Response:",
-            options=PROMPT_GENERATOR_FORMATS,
-            index=selected_format_index,
-            key="pg_format_select",
-            help="Defines the structure of the AI's output (e.g., 'Bullet Points', 'Code Snippet', 'JSON')."
-        )
-        st.session_state["pg_selected_format"] = selected_format
-
-    col3, col4 = st.columns(2)
-    with col3:
-        # Word Count Limit for AI's Response
-        word_limit = st.slider(
-            "Approximate Word Count Limit for AI's Response:",
-            min_value=50,
-            max_value=2000,
-            value=st.session_state.get("pg_word_limit", 500),
-            step=50,
-            key="pg_word_limit_slider",
-            help="Set an approximate word count for the AI's final output."
-        )
-        st.session_state["pg_word_limit"] = word_limit
-
-    with col4:
-        # Complexity Level of the Engineered Prompt
-        selected_complexity_index = PROMPT_COMPLEXITY_LEVELS.index(st.session_state.get("pg_selected_complexity", "Intermediate (Detailed & Clear)")) \
-            if st.session_state.get("pg_selected_complexity", "Intermediate (Detailed & Clear)") in PROMPT_COMPLEXITY_LEVELS else 1
-        selected_complexity = st.selectbox(
-            "Complexity Level of Engineered Prompt:",
-            options=PROMPT_COMPLEXITY_LEVELS,
-            index=selected_complexity_index,
-            key="pg_complexity_select",
-            help="How detailed and sophisticated should the generated prompt itself be? This guides the AI in its prompt engineering."
-        )
-        st.session_state["pg_selected_complexity"] = selected_complexity
+        st.session_state["pg_user_task"] = user_task # Persist in session state.
 
-    st.markdown("---")
-
-    # 3.3 Generate and Rewrite Buttons
-    col_gen, col_rew, col_clear = st.columns([0.4, 0.4, 0.2])
-
-    with col_gen:
-        generate_button_clicked = st.button(
-            shared_utils.MSG_GENERATE_BUTTON,
-            use_container_width=True,
-            key="pg_generate_button",
-            help="Click to generate an optimized prompt based on your inputs."
-        )
+        st.markdown("---")
 
-    with col_rew:
-        # Dynamic Rewrite Feature
-        # This button allows the user to refine an existing generated prompt.
-        rewrite_button_clicked = st.button(
-            "🔄 Rewrite Prompt",
-            use_container_width=True,
-            key="pg_rewrite_button",
-            help="Use AI to refine the currently generated prompt based on new instructions.",
-            disabled=st.session_state.get("pg_generated_prompt", "") == "" or st.session_state.get("pg_generated_prompt", "") == "Your engineered prompt will appear here."
-        )
+        # 3.2 Prompt Customization Options
+        st.subheader("✨ Customize Your Prompt")
+        col1, col2 = st.columns(2)
 
-    with col_clear:
-        # Clear Button
-        clear_button_clicked = st.button(
-            "🗑️ Clear",
-            use_container_width=True,
-            key="pg_clear_button",
-            help="Clear all inputs and generated prompt.",
-        )
+        with col1:
+            # Tone Selection
+            selected_tone = st.selectbox(
+                "Desired Tone for AI's Response:",
+                options=PROMPT_GENERATOR_TONES,
+                key="pg_tone_select",
+                help="Influences the emotional quality and style of the AI's output (e.g., 'Formal', 'Creative', 'Humorous')."
+            )
+            st.session_state["pg_selected_tone"] = selected_tone
+
+        with col2:
+            # Format Selection
+            selected_format = st.selectbox(
+                "Desired Output Format for AI's Response:",
+                options=PROMPT_GENERATOR_FORMATS,
+                key="pg_format_select",
+                help="Defines the structure of the AI's output (e.g., 'Bullet Points', 'Code Snippet', 'JSON')."
+            )
+            st.session_state["pg_selected_format"] = selected_format
+
+        col3, col4 = st.columns(2)
+        with col3:
+            # Word Count Limit for AI's Response
+            word_limit = st.slider(
+                "Approximate Word Count Limit for AI's Response:",
+                min_value=50,
+                max_value=2000,
+                step=50,
+                key="pg_word_limit_slider",
+                help="Set an approximate word count for the AI's final output."
+            )
+            st.session_state["pg_word_limit"] = word_limit
+
+        with col4:
+            # Complexity Level of the Engineered Prompt
+            selected_complexity = st.selectbox(
+                "Complexity Level of Engineered Prompt:",
+                options=PROMPT_COMPLEXITY_LEVELS,
+                key="pg_complexity_select",
+                help="How detailed and sophisticated should the generated prompt itself be? This guides the AI in its prompt engineering."
+            )
+            st.session_state["pg_selected_complexity"] = selected_complexity
 
-    # Handle the clear button click
-    if clear_button_clicked:
-        st.session_state["pg_user_task"] = ""
-        st.session_state["pg_generated_prompt"] = ""
-        st.session_state["pg_selected_tone"] = "Neutral"
-        st.session_state["pg_selected_format"] = "Paragraph"
-        st.session_state["pg_word_limit"] = 500
-        st.session_state["pg_selected_complexity"] = "Intermediate (Detailed & Clear)"
-        st.experimental_rerun() # Rerun to clear inputs in the UI.
+        st.markdown("---")
 
-    # 3.4 Generated Prompt Display Area
-    st.subheader("🧠 AI-Engineered Prompt")
-    # Initialize generated_prompt in session state if not already present
-    if "pg_generated_prompt" not in st.session_state:
-        st.session_state["pg_generated_prompt"] = ""
+        # 3.3 Generate and Clear Buttons
+        col_gen, col_clear = st.columns([0.8, 0.2])
 
-    # Text area to display the generated prompt.
-    display_prompt_value = st.session_state["pg_generated_prompt"] if st.session_state["pg_generated_prompt"] else "Your engineered prompt will appear here."
-
-    generated_prompt_output = st.text_area(
-        "Copy the optimized prompt below:",
-        value=display_prompt_value,
-        height=350,
-        key="pg_generated_prompt_output",
-        disabled=True # Make the text area read-only.
-    )
+        with col_gen:
+            generate_button_clicked = st.form_submit_button(
+                shared_utils.MSG_GENERATE_BUTTON,
+                use_container_width=True,
+                help="Click to generate an optimized prompt based on your inputs."
+            )
 
-    if st.session_state["pg_generated_prompt"]:
-        shared_utils.add_copy_to_clipboard_button(st.session_state["pg_generated_prompt"], shared_utils.MSG_COPY_BUTTON)
-        st.info("Click the 'Copy to Clipboard' button above to easily copy the generated prompt.")
-        shared_utils.display_ai_powered_notice() # Indicate AI generation.
+        with col_clear:
+            # Clear Button
+            # Clear Button (state is reset in its callback)
+            st.form_submit_button(
+                "🗑️ Clear",
+                use_container_width=True,
+                help="Clear all inputs and generated prompt.",
+                on_click=_clear_generator_state
+            )
 
-    # 3.5 Logic for Generate and Rewrite Actions
+    # Handle the generate button click
+    # Handled before the display area is drawn, so the new prompt renders in this same run
+    # without an extra rerun.
     if generate_button_clicked:
         logger.info("Generate prompt button clicked.")
         generated_text = generate_engineered_prompt_with_gemini(
@@ -352,19 +529,41 @@ def run(api_key_valid: bool):
             st.success("Prompt successfully generated!")
         else:
             st.session_state["pg_generated_prompt"] = "" # Clear on error.
-        st.experimental_rerun() # Rerun to update the text area.
 
+    # 3.4 Generated Prompt Display Area
+    st.subheader("🧠 AI-Engineered Prompt")
+    # Initialize generated_prompt in session state if not already present
+    if "pg_generated_prompt" not in st.session_state:
+        st.session_state["pg_generated_prompt"] = ""
+
+    if st.session_state["pg_generated_prompt"]:
+        # The copy block is the display of the generated prompt.
+        shared_utils.add_copy_to_clipboard_button(st.session_state["pg_generated_prompt"])
+        shared_utils.display_ai_powered_notice() # Indicate AI generation.
+    else:
+        # Nothing generated yet: a caption instead of an empty 350px read-only text area.
+        st.caption("Your engineered prompt will appear here.")
+
+    # 3.5 Dynamic Rewrite Feature
+    # The instruction and its button share a form, so typing the instruction does not rerun
+    # the script and the rewrite runs on the same submit that carries the instruction.
+    with st.form("pg_rewrite_form"):
+        rewrite_instruction = st.text_input(
+            "How would you like to rewrite/refine the current prompt?",
+            placeholder="E.g., 'Make it more concise', 'Add a strict word count', 'Change the tone to sarcastic'.",
+            key="pg_rewrite_instruction"
+        )
+        rewrite_button_clicked = st.form_submit_button(
+            "🔄 Rewrite Prompt",
+            use_container_width=True,
+            help="Use AI to refine the currently generated prompt based on new instructions.",
+            disabled=not st.session_state["pg_generated_prompt"]
+        )
+
+    # 3.6 Logic for the Rewrite Action
     if rewrite_button_clicked:
-        if st.session_state["pg_generated_prompt"].strip() and st.session_state["pg_generated_prompt"] != "Your engineered prompt will appear here.":
+        if st.session_state["pg_generated_prompt"].strip():
             logger.info("Rewrite prompt button clicked.")
-            # Get specific rewrite instructions from user if available.
-            rewrite_instruction = st.text_input(
-                "How would you like to rewrite/refine the current prompt?",
-                value="",
-                placeholder="E.g., 'Make it more concise', 'Add a strict word count', 'Change the tone to sarcastic'.",
-                key="pg_rewrite_instruction"
-            )
-
             if rewrite_instruction.strip():
                 # Pass the existing generated prompt as the 'user_task' for rewriting logic.
                 # The internal payload function handles distinguishing between initial generation and rewrite.
@@ -380,13 +579,50 @@ def run(api_key_valid: bool):
                 )
                 if rewritten_text:
                     st.session_state["pg_generated_prompt"] = rewritten_text
-                    st.success("Prompt successfully rewritten!")
-                else:
-                    st.session_state["pg_generated_prompt"] = "" # Clear on error.
-                st.experimental_rerun()
+                    st.rerun() # The display area is drawn above this form, so rerun to refresh it.
+                # On failure the previous prompt is kept and the error shown above stays visible.
             else:
                 st.warning("Please provide an instruction for rewriting the prompt.")
         else:
             st.warning("No prompt available to rewrite. Please generate one first.")
 
+    # 3.7 Tone Variants
+    # Generates the same task at several tones in a single batch instead of one click per tone.
+    with st.expander("🎛️ Generate Variants", expanded=bool(st.session_state.get("pg_variants"))):
+        variant_tones = st.multiselect(
+            f"Tones to generate (up to {MAX_PROMPT_VARIANTS}):",
+            options=PROMPT_GENERATOR_TONES,
+            max_selections=MAX_PROMPT_VARIANTS,
+            key="pg_variant_tones",
+            help="Each selected tone produces one variant, using the format, word limit and complexity above."
+        )
+        if st.button(
+            f"✨ Generate {len(variant_tones)} Variants",
+            use_container_width=True,
+            key="pg_generate_variants_button",
+            disabled=not variant_tones
+        ):
+            if not user_task.strip():
+                st.error(shared_utils.MSG_TASK_MISSING)
+            else:
+                with st.spinner(shared_utils.MSG_LOADING_AI):
+                    variant_texts = generate_engineered_prompts_batch(api_key_valid, [
+                        {
+                            "user_task": user_task.strip(),
+                            "tone": tone,
+                            "output_format": selected_format,
+                            "word_limit": word_limit,
+                            "complexity": selected_complexity
+                        }
+                        for tone in variant_tones
+                    ])
+                st.session_state["pg_variants"] = list(zip(variant_tones, variant_texts))
+
+        for tone, variant_text in st.session_state.get("pg_variants", []):
+            st.markdown(f"**{tone}**")
+            if variant_text:
+                st.code(variant_text, language=None)
+            else:
+                st.warning(shared_utils.MSG_GENERATION_FAILED)
+
     logger.info("Prompt Generator module UI rendered.")
@@ -4,8 +4,11 @@
 # that users can browse, use, and potentially contribute to.
 
 import streamlit as st
-import pandas as pd
 import logging
+import os # For locating the sample prompts file
+import json # For loading the sample prompts file
+import sys # For interning tag and category strings
+import re # For multi-keyword search
 from modules import shared_utils # Import shared utility functions
 
 logger = logging.getLogger(__name__)
@@ -25,118 +28,47 @@ Discover a vast collection of pre-designed prompts for various AI tasks.
 * **Copy & Adapt:** Use prompts directly or modify them in the Prompt Generator.
 """
 
-# 1.2 Hardcoded Sample Prompts (Simulating a Database/API)
-# In a full-scale application, this data would be loaded from a database (e.g., Firestore),
-# an external API, or a structured file. For this demo, we use a Python list of dictionaries.
-SAMPLE_PROMPTS = [
-    {
-        "id": 1,
-        "name": "Creative Story Starter",
-        "category": "Creative Writing",
-        "tags": ["story", "creative", "fiction", "fantasy"],
-        "prompt_text": "Write the first paragraph of a fantasy novel where a disillusioned wizard discovers a hidden, sentient forest.",
-        "tone": "Descriptive",
-        "format": "Paragraph",
-        "complexity": "Intermediate"
-    },
-    {
-        "id": 2,
-        "name": "Email for Client Update",
-        "category": "Business Communication",
-        "tags": ["email", "business", "update", "client"],
-        "prompt_text": "Draft a concise professional email to a client providing a weekly project update. Highlight progress on 'Feature X' and mention upcoming steps for 'Module Y'. Maintain a formal yet friendly tone.",
-        "tone": "Formal, Friendly",
-        "format": "Email",
-        "complexity": "Beginner"
-    },
-    {
-        "id": 3,
-        "name": "Python Function for Data Analysis",
-        "category": "Coding & Development",
-        "tags": ["python", "code", "data analysis", "function"],
-        "prompt_text": "Write a Python function named `analyze_sales_data` that takes a Pandas DataFrame with columns 'Product', 'Region', 'Sales', and 'Date' as input. The function should calculate total sales per region and return the top 3 regions by sales. Include docstrings and type hints.",
-        "tone": "Technical",
-        "format": "Code Snippet",
-        "complexity": "Advanced"
-    },
-    {
-        "id": 4,
-        "name": "Social Media Post (Product Launch)",
-        "category": "Marketing",
-        "tags": ["social media", "marketing", "product launch", "tweet"],
-        "prompt_text": "Create a catchy social media post (for Twitter/X) announcing the launch of a new eco-friendly water bottle. Emphasize sustainability and durability. Include relevant emojis and hashtags.",
-        "tone": "Enthusiastic",
-        "format": "Social Media Post",
-        "complexity": "Beginner"
-    },
-    {
-        "id": 5,
-        "name": "Debate Argument: AI in Education",
-        "category": "Academic",
-        "tags": ["debate", "education", "AI", "argument"],
-        "prompt_text": "Prepare a structured argument supporting the integration of AI tools in K-12 education. Focus on personalized learning, efficiency for teachers, and access to information. Provide three main points with supporting evidence.",
-        "tone": "Academic, Persuasive",
-        "format": "Numbered List",
-        "complexity": "Intermediate"
-    },
-    {
-        "id": 6,
-        "name": "Recipe for Vegan Chili",
-        "category": "Lifestyle",
-        "tags": ["recipe", "cooking", "vegan", "food"],
-        "prompt_text": "Provide a simple, easy-to-follow recipe for a classic vegan chili. Include ingredients list, step-by-step instructions, and approximate cooking time. Assume basic cooking knowledge.",
-        "tone": "Instructive",
-        "format": "Recipe",
-        "complexity": "Beginner"
-    },
-    {
-        "id": 7,
-        "name": "Job Interview Questions (Software Engineer)",
-        "category": "HR & Recruitment",
-        "tags": ["interview", "job", "software engineer", "questions"],
-        "prompt_text": "Generate 5 behavioral and 5 technical interview questions for a junior software engineer position. Behavioral questions should focus on teamwork and problem-solving, technical on Python and basic algorithms.",
-        "tone": "Professional, Direct",
-        "format": "Numbered List",
-        "complexity": "Intermediate"
-    },
-    {
-        "id": 8,
-        "name": "Dialogue: Customer Support Issue",
-        "category": "Customer Service",
-        "tags": ["dialogue", "customer service", "script", "support"],
-        "prompt_text": "Write a short dialogue between a customer (frustrated about a delayed delivery) and a customer service representative (calm and helpful) aiming to resolve the issue. Include empathy and a clear solution.",
-        "tone": "Empathetic",
-        "format": "Dialogue",
-        "complexity": "Intermediate"
-    },
-    {
-        "id": 9,
-        "name": "Historical Event Summary: Moon Landing",
-        "category": "Education",
-        "tags": ["history", "summary", "space", "moon landing"],
-        "prompt_text": "Provide a concise summary of the Apollo 11 Moon Landing (1969), focusing on its key figures, significance, and immediate impact. Limit to 200 words.",
-        "tone": "Informative",
-        "format": "Summary",
-        "complexity": "Beginner"
-    },
-    {
-        "id": 10,
-        "name": "JSON Schema for User Profile",
-        "category": "Coding & Development",
-        "tags": ["json", "schema", "API", "user profile"],
-        "prompt_text": "Generate a JSON schema for a user profile object, including fields for 'id' (string), 'username' (string), 'email' (string, email format), 'age' (integer, min 18), 'is_active' (boolean), and 'roles' (array of strings).",
-        "tone": "Technical",
-        "format": "JSON",
-        "complexity": "Advanced"
-    }
-]
-
-# Convert to DataFrame for easier searching and filtering
-PROMPT_DF = pd.DataFrame(SAMPLE_PROMPTS)
-
-# Extract unique categories and tags for filtering
-ALL_CATEGORIES = ["All"] + sorted(PROMPT_DF["category"].unique().tolist())
-ALL_TAGS = sorted(list(set([tag for tags_list in PROMPT_DF["tags"] for tag in tags_list])))
+# 1.2 Sample Prompts (Simulating a Database/API)
+# In a full-scale application, this data would be loaded from a database (e.g., Firestore)
+# or an external API. For this demo, the prompts live in a JSON file read by the cached loader below.
+SAMPLE_PROMPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample_prompts.json")
+
+# 1.3 Columns shown in the prompt table; the full prompt text appears in the detail panel.
+PROMPT_TABLE_COLUMNS = ["name", "category", "tone", "format", "complexity", "tags"]
+
+# 1.4 Prompt Library Loader
+@st.cache_resource(show_spinner=False)
+def _load_prompt_library() -> tuple:
+    """
+    Loads the sample prompts and builds their filter options once per process. The cached
+    objects are shared by every session, so callers must not mutate them. A lowercased search
+    string per prompt and an inverted tag index are precomputed here, so filtering never
+    lowercases or scans the same strings again.
+
+    Returns:
+        tuple: (list of prompt dicts, category options including "All", category -> option position,
+            sorted list of all tags, tag index mapping each tag to the positions of the prompts carrying it)
+    """
+    with open(SAMPLE_PROMPTS_PATH, encoding="utf-8") as prompts_file:
+        prompts = json.load(prompts_file)
+
+    # Tags and categories repeat across prompts; interning keeps one string object per value in
+    # the process-wide cached library instead of one copy per prompt.
+    tag_index = {}
+    for position, prompt in enumerate(prompts):
+        prompt["tags"] = [sys.intern(tag) for tag in prompt["tags"]]
+        prompt["category"] = sys.intern(prompt["category"])
+        # Lowercased name, text and category joined by NUL, so one search scans all three
+        # fields without a keyword ever matching across a field boundary.
+        prompt["_searchable"] = "\x00".join((prompt["name"], prompt["prompt_text"], prompt["category"])).lower()
+        for tag in prompt["tags"]:
+            tag_index.setdefault(tag, set()).add(position)
+
+    # Extract unique categories and tags for filtering
+    all_categories = ["All"] + sorted({prompt["category"] for prompt in prompts})
+    category_index = {category: i for i, category in enumerate(all_categories)}
+    all_tags = sorted(tag_index)
+    return prompts, all_categories, category_index, all_tags, tag_index
 
 
 # ====================================================================================================
@@ -144,11 +76,61 @@ ALL_TAGS = sorted(list(set([tag for tags_list in PROMPT_DF["tags"] for tag in ta
 # This section defines the user interface for the Prompt Library module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def _sync_query_param(name: str, value: str):
+    """
+    Mirrors a filter value into the page URL, dropping the parameter when the filter is empty.
+    Only writes on change, since every write sends a URL update to the browser.
+
+    Args:
+        name (str): The query parameter name.
+        value (str): The filter value ("" removes the parameter).
+    """
+    if not value:
+        if name in st.query_params:
+            del st.query_params[name]
+    elif st.query_params.get(name) != value:
+        st.query_params[name] = value
+
+def _use_prompt_in_generator(row: dict):
+    """
+    on_click callback for "Use This Prompt": pre-fills the Prompt Generator with the prompt and
+    points the navigation at it. Runs before the next script run, so the sidebar navigation radio
+    (which owns the "main_module_navigation" key) can still be updated. The button sits inside the
+    module fragment, so the click only reruns the fragment; `run()` sees the
+    "pl_navigate_to_generator" flag and requests a full app rerun to actually switch modules.
+
+    Args:
+        row (dict): The selected prompt from the library.
+    """
+    # Imported here so browsing the library does not load the generator's dependencies.
+    from modules import prompt_generator
+    session_state = st.session_state
+    session_state["current_module"] = "Prompt Generator"
+    session_state["main_module_navigation"] = "Prompt Generator"
+    session_state["pl_navigate_to_generator"] = True
+    session_state["pg_user_task"] = row['prompt_text']
+    # Try to pre-select tone and format if they exist in the Generator's lists.
+    if row['tone'] in prompt_generator.PROMPT_GENERATOR_TONES:
+        session_state["pg_selected_tone"] = row['tone']
+    if row['format'] in prompt_generator.PROMPT_GENERATOR_FORMATS:
+        session_state["pg_selected_format"] = row['format']
+    # Drop any leftover generator widget state so its inputs are re-seeded from the keys above.
+    for widget_key in prompt_generator.PG_WIDGET_STATE_KEYS:
+        session_state.pop(widget_key, None)
+    logger.info("User chose to use prompt ID %s in Generator.", row['id'])
+
+def run():
     """
     Main function to run the Prompt Library module's Streamlit UI.
     This function is called by app.py when the 'Prompt Library' module is selected.
     """
+    # "Use This Prompt" was clicked: rerun the whole app so the sidebar and dispatcher pick up
+    # the new module (a fragment rerun would only redraw the library).
+    if st.session_state.pop("pl_navigate_to_generator", False):
+        st.rerun(scope="app")
+
+    prompts, all_categories, category_index, all_tags, tag_index = _load_prompt_library()
+
     st.header("📚 Prompt Library")
     st.markdown("Browse and utilize a collection of expert-crafted prompt templates.")
     st.markdown("---")
@@ -157,108 +139,111 @@ def run(api_key_valid: bool):
     shared_utils.display_module_help(PROMPT_LIBRARY_HELP_MESSAGE)
 
     # 2.1 Search and Filter Controls
+    # Filter state lives in the URL (q, cat, tags) rather than in session state, so a filtered
+    # view survives a server restart and can be shared as a link.
+    query_params = st.query_params
     st.subheader("🔍 Search & Filter Prompts")
     col_search, col_category, col_tags = st.columns([0.5, 0.25, 0.25])
 
     with col_search:
         search_query = st.text_input(
             "Search by Keyword:",
-            value=st.session_state.get("pl_search_query", ""),
+            value=query_params.get("q", ""),
             placeholder="e.g., 'story', 'email', 'python'",
             key="pl_search_query_input",
-            help="Type keywords to find relevant prompts by name or content."
+            help="Type keywords to find relevant prompts by name, content or category. All keywords must match."
         )
-        st.session_state["pl_search_query"] = search_query
 
     with col_category:
-        selected_category_index = ALL_CATEGORIES.index(st.session_state.get("pl_selected_category", "All")) \
-            if st.session_state.get("pl_selected_category", "All") in ALL_CATEGORIES else 0
+        selected_category_index = category_index.get(query_params.get("cat", "All"), 0)
         selected_category = st.selectbox(
             "Filter by Category:",
-            options=ALL_CATEGORIES,
+            options=all_categories,
             index=selected_category_index,
             key="pl_category_select",
             help="Narrow down prompts by their primary category."
         )
-        st.session_state["pl_selected_category"] = selected_category
 
     with col_tags:
-        # Use multiselect for tags to allow multiple tag filters
+        # Use multiselect for tags to allow multiple tag filters.
+        # Unknown tags in a hand-edited URL are dropped; the multiselect rejects them.
         selected_tags = st.multiselect(
             "Filter by Tags:",
-            options=ALL_TAGS,
-            default=st.session_state.get("pl_selected_tags", []),
+            options=all_tags,
+            default=[tag for tag in query_params.get("tags", "").split(",") if tag in tag_index],
             key="pl_tags_multiselect",
             help="Select one or more tags to filter prompts."
         )
-        st.session_state["pl_selected_tags"] = selected_tags
+
+    _sync_query_param("q", search_query)
+    _sync_query_param("cat", "" if selected_category == "All" else selected_category)
+    _sync_query_param("tags", ",".join(selected_tags))
 
     st.markdown("---")
 
     # 2.2 Filter Prompts Logic
-    filtered_df = PROMPT_DF.copy()
-
-    # Apply search query filter
-    if search_query:
-        # Search across 'name', 'prompt_text', and 'category'
-        filtered_df = filtered_df[
-            filtered_df.apply(
-                lambda row: search_query.lower() in str(row['name']).lower() or
-                            search_query.lower() in str(row['prompt_text']).lower() or
-                            search_query.lower() in str(row['category']).lower(),
-                axis=1
-            )
-        ]
-        logger.debug(f"Filtered by search query: {search_query}. Rows: {len(filtered_df)}")
-
-
-    # Apply category filter
-    if selected_category != "All":
-        filtered_df = filtered_df[filtered_df["category"] == selected_category]
-        logger.debug(f"Filtered by category: {selected_category}. Rows: {len(filtered_df)}")
-
-    # Apply tags filter
-    if selected_tags:
-        # Filter rows where ANY of the selected_tags are present in the 'tags' list
-        filtered_df = filtered_df[
-            filtered_df["tags"].apply(lambda tags_list: any(tag in tags_list for tag in selected_tags))
-        ]
-        logger.debug(f"Filtered by tags: {selected_tags}. Rows: {len(filtered_df)}")
-
-    st.subheader(f"✨ Available Prompts ({len(filtered_df)} found)")
-
-    if filtered_df.empty:
+    # A single pass over the cached prompts, using the precomputed search strings and tag index.
+    # Every keyword must appear (in any field, any order): one lookahead per keyword, compiled once.
+    keywords = search_query.lower().split()
+    search_pattern = re.compile("".join(f"(?=.*?{re.escape(keyword)})" for keyword in keywords), re.DOTALL) if keywords else None
+    # Keep rows where ANY of the selected_tags are present; None means no tag filter.
+    tagged_positions = set().union(*(tag_index.get(tag, ()) for tag in selected_tags)) if selected_tags else None
+    filtered_prompts = [
+        prompt for position, prompt in enumerate(prompts)
+        if (search_pattern is None or search_pattern.match(prompt["_searchable"]))
+        and (selected_category == "All" or prompt["category"] == selected_category)
+        and (tagged_positions is None or position in tagged_positions)
+    ]
+    logger.debug(
+        "Filtered by search query: %s, category: %s, tags: %s. Rows: %d",
+        search_query, selected_category, selected_tags, len(filtered_prompts)
+    )
+
+    st.subheader(f"✨ Available Prompts ({len(filtered_prompts)} found)")
+
+    if not filtered_prompts:
         st.info("No prompts match your current filters. Try adjusting your search or categories.")
         logger.info("No prompts found for current filters.")
     else:
         # 2.3 Display Filtered Prompts
-        # Iterate through the filtered DataFrame and display each prompt.
-        for index, row in filtered_df.iterrows():
-            with st.expander(f"**{row['name']}** ({row['category']})", expanded=False):
-                st.markdown(f"**Description:** {row['prompt_text']}")
-                st.markdown(f"**Tone:** `{row['tone']}` | **Format:** `{row['format']}` | **Complexity:** `{row['complexity']}`")
-                st.markdown(f"**Tags:** `{'`, `'.join(row['tags'])}`")
-
-                # "Use This Prompt" button copies the prompt text and can potentially
-                # navigate to the Prompt Generator with this prompt pre-filled.
+        # One virtualized table for all rows, plus a single detail panel for the selected row,
+        # so the number of widgets stays constant as the library grows.
+        table_event = st.dataframe(
+            filtered_prompts,
+            column_order=PROMPT_TABLE_COLUMNS,
+            use_container_width=True,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key="pl_prompt_table"
+        )
+        selected_rows = table_event.selection.rows
+        if not selected_rows or selected_rows[0] >= len(filtered_prompts):
+            st.caption("Select a prompt in the table to see its details.")
+        else:
+            row = filtered_prompts[selected_rows[0]]
+            with st.container(border=True):
+                # One markdown element for the whole panel body instead of one per line.
+                st.markdown(
+                    f"#### {row['name']} ({row['category']})\n\n"
+                    f"**Tone:** `{row['tone']}` | **Format:** `{row['format']}` | **Complexity:** `{row['complexity']}`\n\n"
+                    f"**Tags:** `{'`, `'.join(row['tags'])}`"
+                )
+
+                # "Use This Prompt" copies the prompt text and navigates to the
+                # Prompt Generator with this prompt pre-filled.
                 col_use, col_copy = st.columns([0.2, 0.8])
                 with col_use:
-                    if st.button(f"🚀 Use This Prompt", key=f"use_prompt_{row['id']}", help="Pre-fill this prompt in the Prompt Generator module."):
-                        st.session_state["current_module"] = "Prompt Generator"
-                        st.session_state["pg_user_task"] = row['prompt_text']
-                        # Try to pre-select tone and format if they exist in the Generator's lists.
-                        if row['tone'] in shared_utils.PROMPT_GENERATOR_TONES:
-                            st.session_state["pg_selected_tone"] = row['tone']
-                        if row['format'] in shared_utils.PROMPT_GENERATOR_FORMATS:
-                            st.session_state["pg_selected_format"] = row['format']
-                        st.success(f"Prompt '{row['name']}' copied to Prompt Generator.")
-                        st.experimental_rerun() # Rerun to switch module and update generator.
-                        logger.info(f"User chose to use prompt ID {row['id']} in Generator.")
+                    st.button(
+                        "🚀 Use This Prompt", key="pl_use_prompt_button",
+                        help="Pre-fill this prompt in the Prompt Generator module.",
+                        on_click=_use_prompt_in_generator, args=(row,)
+                    )
 
                 with col_copy:
-                    # Provide a direct copy button for the prompt text
-                    shared_utils.add_copy_to_clipboard_button(row['prompt_text'], f"📋 Copy Prompt #{row['id']}")
-                    st.info("Click 'Use This Prompt' to pre-fill it in the Prompt Generator, or 'Copy Prompt' for direct use.")
+                    # The copy block is the display of the prompt text.
+                    shared_utils.add_copy_to_clipboard_button(row['prompt_text'])
+                    st.info("Click 'Use This Prompt' to pre-fill it in the Prompt Generator, or copy it for direct use.")
 
     shared_utils.display_ai_powered_notice() # Indicate AI generation capabilities (if relevant for future features).
     logger.info("Prompt Library module UI rendered.")
@@ -5,6 +5,8 @@
 
 import streamlit as st
 import logging
+import functools # For memoizing composed prompts
+import re # For splitting the multi-placeholder template
 from modules import shared_utils # Import shared utility functions
 
 logger = logging.getLogger(__name__)
@@ -15,14 +17,23 @@ logger = logging.getLogger(__name__)
 # ====================================================================================================
 
 # 1.1 Prompt Type Definitions
+# Strategy names, shared by the definitions below, the transformation logic and the UI.
+STRATEGY_ZERO_SHOT = "Zero-shot"
+STRATEGY_FEW_SHOT = "Few-shot"
+STRATEGY_CHAIN_OF_THOUGHT = "Chain-of-thought (CoT)"
+STRATEGY_ROLE_PLAY = "Role-play"
+STRATEGY_CONSTRAINT_BASED = "Constraint-based"
+STRATEGY_PERSONA = "Persona Embedding"
+STRATEGY_SYSTEM_FORMAT = "System + User + Assistant Format"
+
 # Each key represents a prompt strategy, and its value is a dictionary
 # containing a description and the "prefix" or "instruction" to add to the base prompt.
 PROMPT_STRATEGIES = {
-    "Zero-shot": {
+    STRATEGY_ZERO_SHOT: {
         "description": "Provides a direct instruction to the AI without any examples. Assumes the AI has sufficient prior knowledge.",
         "instruction": "Based on the following request, provide a direct answer or complete the task:"
     },
-    "Few-shot": {
+    STRATEGY_FEW_SHOT: {
         "description": "Guides the AI with a few examples (input-output pairs) before the final request. Useful for specific formatting or nuanced tasks.",
         "instruction": "I will provide a few examples of input-output pairs. Understand the pattern and apply it to my final request.\n\n"
                       "**Examples:**\n"
@@ -30,15 +41,15 @@ PROMPT_STRATEGIES = {
                       "Input: [Example Input 2]\nOutput: [Example Output 2]\n\n"
                       "**Your Turn:**"
     },
-    "Chain-of-thought (CoT)": {
+    STRATEGY_CHAIN_OF_THOUGHT: {
         "description": "Instructs the AI to think step-by-step, showing its reasoning process before giving the final answer. Improves accuracy for complex problems.",
         "instruction": "Let's think step by step. First, analyze the problem, then outline your reasoning, and finally provide the solution. Your output should clearly separate the thinking process from the final answer."
     },
-    "Role-play": {
+    STRATEGY_ROLE_PLAY: {
         "description": "Asks the AI to adopt a specific persona or role when generating content. Enhances relevance and tone.",
         "instruction": "You are a [ROLE, e.g., seasoned marketing expert / helpful teaching assistant / critical literary critic]. Act in this role when responding to the following request:"
     },
-    "Constraint-based": {
+    STRATEGY_CONSTRAINT_BASED: {
         "description": "Applies strict rules or limitations to the AI's output (e.g., word count, specific keywords, forbidden phrases).",
         "instruction": "Your response must strictly adhere to the following constraints:\n"
                       "- [Constraint 1, e.g., Max 100 words]\n"
@@ -46,11 +57,11 @@ PROMPT_STRATEGIES = {
                       "- [Constraint 3, e.g., Do not mention brand names]\n"
                       "Here is the request:"
     },
-    "Persona Embedding": {
+    STRATEGY_PERSONA: {
         "description": "Guides the AI to adopt a specific identity, background, or style. More detailed than simple role-play.",
         "instruction": "Adopt the persona of a [PERSONA DESCRIPTION, e.g., witty, sarcastic, and highly intelligent AI who enjoys wordplay]. Ensure your responses reflect this persona. Here is your task:"
     },
-    "System + User + Assistant Format": {
+    STRATEGY_SYSTEM_FORMAT: {
         "description": "Structures the prompt for multi-turn conversations, defining distinct roles for clarity in complex interactions.",
         "instruction": "You will participate in a multi-turn conversation. Here is the context and your role definition:\n"
                       "**System:** [Overall instructions for the AI for the entire conversation, e.g., You are a customer support agent helping users with technical issues.]\n"
@@ -59,6 +70,73 @@ PROMPT_STRATEGIES = {
     }
 }
 
+# Strategy names in display order and their positions, derived once at import so each rerun
+# selects the radio default with a single dict lookup instead of rebuilding and scanning a list.
+PROMPT_STRATEGY_NAMES = tuple(PROMPT_STRATEGIES)
+PROMPT_STRATEGY_INDEX = {name: i for i, name in enumerate(PROMPT_STRATEGY_NAMES)}
+
+# Instruction text by strategy, resolved once instead of through the nested dict on every call.
+_INSTRUCTION_FOR = {strategy_key: strategy["instruction"] for strategy_key, strategy in PROMPT_STRATEGIES.items()}
+
+# Literal placeholder substituted in each single-placeholder strategy's instruction. The
+# instructions are split around it once at import, so applying a strategy only joins the
+# fixed segments with the user's value instead of rescanning the template with str.replace.
+STRATEGY_PLACEHOLDERS = {
+    STRATEGY_FEW_SHOT: "**Examples:**",
+    STRATEGY_ROLE_PLAY: "[ROLE, e.g., seasoned marketing expert / helpful teaching assistant / critical literary critic]",
+    STRATEGY_CONSTRAINT_BASED: "- [Constraint 1, e.g., Max 100 words]",
+    STRATEGY_PERSONA: "[PERSONA DESCRIPTION, e.g., witty, sarcastic, and highly intelligent AI who enjoys wordplay]",
+}
+_STRATEGY_SEGMENTS = {
+    strategy_key: tuple(_INSTRUCTION_FOR[strategy_key].split(placeholder, 1))
+    for strategy_key, placeholder in STRATEGY_PLACEHOLDERS.items()
+}
+
+# Session-state keys of the Few-shot example widgets, built once for the largest example count
+# instead of formatting fresh key strings for every widget on every rerun.
+MAX_FEWSHOT_EXAMPLES = 5
+PTT_FEWSHOT_INPUT_KEYS = tuple(f"ptt_fewshot_input_{i}" for i in range(MAX_FEWSHOT_EXAMPLES))
+PTT_FEWSHOT_OUTPUT_KEYS = tuple(f"ptt_fewshot_output_{i}" for i in range(MAX_FEWSHOT_EXAMPLES))
+
+# Defaults of the persisted strategy inputs. Widget state is dropped while a strategy's inputs
+# are not shown, so each input widget is re-seeded from these keys (see PTT_WIDGET_STATE_KEYS).
+PTT_STRATEGY_INPUT_DEFAULTS = {
+    "ptt_role_input": "",
+    "ptt_constraints_text": "- Max 200 words\n- Use formal language\n- Avoid jargon",
+    "ptt_persona_desc": "",
+    "ptt_system_instruction": "You are a helpful and knowledgeable AI assistant.",
+}
+
+# Strategy input widget key -> the persisted key it is seeded from and saved to on change.
+PTT_WIDGET_STATE_KEYS = {
+    "ptt_role_input_text": "ptt_role_input",
+    "ptt_constraints_text_area": "ptt_constraints_text",
+    "ptt_persona_desc_text": "ptt_persona_desc",
+    "ptt_system_instruction_text": "ptt_system_instruction",
+}
+
+# Main input widget keys, dropped by the Clear button so the widgets are re-seeded from their
+# persisted keys.
+PTT_MAIN_WIDGET_STATE_KEYS = ("ptt_base_prompt_input", "ptt_strategy_radio", "ptt_num_examples")
+
+# Session-state key prefixes of the strategy-specific inputs, removed by the Clear button.
+PTT_STRATEGY_INPUT_PREFIXES = (
+    "ptt_fewshot_input_", "ptt_fewshot_output_", "ptt_role_input", "ptt_constraints_text",
+    "ptt_persona_desc", "ptt_system_instruction"
+)
+
+# The System + User + Assistant template has three placeholders; it is split on all of them
+# in one pass at import, giving four fixed segments to interleave with the values.
+SYSTEM_FORMAT_PLACEHOLDERS = (
+    "[Overall instructions for the AI for the entire conversation, e.g., You are a customer support agent helping users with technical issues.]",
+    "[The user's initial query or instruction]",
+    "[Your first response should be based on this initial query and system instructions. Future responses will follow.]",
+)
+_SYSTEM_FORMAT_SEGMENTS = tuple(re.split(
+    "|".join(map(re.escape, SYSTEM_FORMAT_PLACEHOLDERS)),
+    _INSTRUCTION_FOR[STRATEGY_SYSTEM_FORMAT]
+))
+
 # 1.2 Initial Help Message for the module
 PROMPT_TYPES_TOOLKIT_HELP_MESSAGE = """
 ### Boost Your Prompts with Advanced Strategies!
@@ -86,46 +164,133 @@ def apply_prompt_strategy(base_prompt: str, strategy_key: str, **kwargs) -> str:
     Returns:
         str: The transformed prompt with the strategy applied.
     """
-    if strategy_key not in PROMPT_STRATEGIES:
+    if strategy_key not in _INSTRUCTION_FOR:
         logger.warning(f"Attempted to apply unknown prompt strategy: {strategy_key}")
         return base_prompt # Return original if strategy is unknown
 
-    instruction_template = PROMPT_STRATEGIES[strategy_key]["instruction"]
+    transformed_prompt = _cached_apply(base_prompt, strategy_key, _freeze_strategy_kwargs(kwargs))
+    logger.info(f"Applied strategy '{strategy_key}'. Transformed prompt length: {len(transformed_prompt)}")
+    return transformed_prompt
+
+def _freeze_strategy_kwargs(kwargs: dict) -> tuple:
+    """
+    Converts strategy kwargs into a hashable, order-independent form for `_cached_apply`:
+    Few-shot examples become (input, output) pairs and lists become tuples.
+    """
+    frozen = {}
+    for name, value in kwargs.items():
+        if name == "examples":
+            value = tuple((ex.get('input', ''), ex.get('output', '')) for ex in value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        frozen[name] = value
+    return tuple(sorted(frozen.items()))
+
+# Memoized on (base prompt, strategy, frozen kwargs): re-applying the same strategy to the same
+# inputs returns the previously composed string instead of assembling it again.
+@functools.lru_cache(maxsize=128)
+def _cached_apply(base_prompt: str, strategy_key: str, frozen_kwargs: tuple) -> str:
+    """
+    Assembles the transformed prompt. See `apply_prompt_strategy` for the arguments;
+    `frozen_kwargs` comes from `_freeze_strategy_kwargs`.
+    """
+    kwargs = dict(frozen_kwargs)
+    instruction_template = _INSTRUCTION_FOR[strategy_key]
     transformed_prompt = ""
 
-    if strategy_key == "Few-shot":
-        examples = kwargs.get("examples", [])
-        example_string = ""
-        for i, ex in enumerate(examples):
-            example_string += f"Input {i+1}: {ex.get('input', '')}\nOutput {i+1}: {ex.get('output', '')}\n\n"
-        transformed_prompt = instruction_template.replace("**Examples:**", f"**Examples:**\n{example_string.strip()}\n\n**Your Turn:**\n{base_prompt}")
-    elif strategy_key == "Role-play":
+    if strategy_key == STRATEGY_FEW_SHOT:
+        examples = kwargs.get("examples", ())
+        transformed_prompt = _assemble_fewshot(
+            base_prompt,
+            [example_input for example_input, _ in examples],
+            [example_output for _, example_output in examples]
+        )
+    elif strategy_key == STRATEGY_ROLE_PLAY:
         role = kwargs.get("role", "general AI assistant")
-        transformed_prompt = instruction_template.replace("[ROLE, e.g., seasoned marketing expert / helpful teaching assistant / critical literary critic]", role) + f"\n\n{base_prompt}"
-    elif strategy_key == "Constraint-based":
+        prefix, suffix = _STRATEGY_SEGMENTS[strategy_key]
+        transformed_prompt = "".join((prefix, role, suffix, "\n\n", base_prompt))
+    elif strategy_key == STRATEGY_CONSTRAINT_BASED:
         constraints = kwargs.get("constraints", [])
         constraint_list_str = "\n".join([f"- {c}" for c in constraints]) if constraints else "- [Add your constraints here]"
-        transformed_prompt = instruction_template.replace("- [Constraint 1, e.g., Max 100 words]", constraint_list_str) + f"\n\n{base_prompt}"
-    elif strategy_key == "Persona Embedding":
+        prefix, suffix = _STRATEGY_SEGMENTS[strategy_key]
+        transformed_prompt = "".join((prefix, constraint_list_str, suffix, "\n\n", base_prompt))
+    elif strategy_key == STRATEGY_PERSONA:
         persona_description = kwargs.get("persona_description", "neutral and helpful AI")
-        transformed_prompt = instruction_template.replace("[PERSONA DESCRIPTION, e.g., witty, sarcastic, and highly intelligent AI who enjoys wordplay]", persona_description) + f"\n\n{base_prompt}"
-    elif strategy_key == "System + User + Assistant Format":
+        prefix, suffix = _STRATEGY_SEGMENTS[strategy_key]
+        transformed_prompt = "".join((prefix, persona_description, suffix, "\n\n", base_prompt))
+    elif strategy_key == STRATEGY_SYSTEM_FORMAT:
         system_inst = kwargs.get("system_instruction", "You are a helpful AI.")
-        transformed_prompt = instruction_template.replace("[Overall instructions for the AI for the entire conversation, e.g., You are a customer support agent helping users with technical issues.]", system_inst)
-        transformed_prompt = transformed_prompt.replace("[The user's initial query or instruction]", base_prompt)
-        transformed_prompt = transformed_prompt.replace("[Your first response should be based on this initial query and system instructions. Future responses will follow.]", "[Assistant response here...]") # Placeholder
+        system_segment, user_segment, assistant_segment, closing_segment = _SYSTEM_FORMAT_SEGMENTS
+        transformed_prompt = "".join((
+            system_segment, system_inst,
+            user_segment, base_prompt,
+            assistant_segment, "[Assistant response here...]", # Placeholder
+            closing_segment
+        ))
     else: # For strategies like Zero-shot, Chain-of-thought that simply prepend.
         transformed_prompt = f"{instruction_template}\n\n{base_prompt}"
 
-    logger.info(f"Applied strategy '{strategy_key}'. Transformed prompt length: {len(transformed_prompt)}")
     return transformed_prompt
 
+def _assemble_fewshot(base_prompt: str, inputs: list, outputs: list) -> str:
+    """
+    Assembles the Few-shot prompt from parallel lists of example inputs and outputs.
+    Free of Streamlit and kwargs handling, so bulk callers (e.g. dataset expansion over many
+    base prompts) can use it directly.
+
+    Args:
+        base_prompt (str): The prompt the examples lead up to.
+        inputs (list): Example inputs, in order.
+        outputs (list): Example outputs, aligned with `inputs`.
+
+    Returns:
+        str: The Few-shot prompt.
+    """
+    # Examples are separated (not terminated) by blank lines, so the block needs no trailing strip().
+    example_string = "\n\n".join(
+        f"Input {i+1}: {example_input}\nOutput {i+1}: {example_output}"
+        for i, (example_input, example_output) in enumerate(zip(inputs, outputs))
+    )
+    prefix, suffix = _STRATEGY_SEGMENTS[STRATEGY_FEW_SHOT]
+    return "".join((prefix, "**Examples:**\n", example_string, "\n\n**Your Turn:**\n", base_prompt, suffix))
+
+def _seed_strategy_widget(widget_key: str) -> str:
+    """
+    Restores a strategy input widget's value from its persisted key (or the default) if
+    Streamlit dropped it, and returns the widget key for use in `key=`.
+    """
+    if widget_key not in st.session_state:
+        state_key = PTT_WIDGET_STATE_KEYS[widget_key]
+        st.session_state[widget_key] = st.session_state.get(state_key, PTT_STRATEGY_INPUT_DEFAULTS[state_key])
+    return widget_key
+
+def _persist_strategy_widget(widget_key: str):
+    """
+    on_change callback: saves a strategy input widget's value to its persisted key, so it
+    survives switching to another strategy and back.
+    """
+    st.session_state[PTT_WIDGET_STATE_KEYS[widget_key]] = st.session_state[widget_key]
+
 # ====================================================================================================
 # SECTION 3: STREAMLIT UI LAYOUT AND INTERACTION
 # This section defines the user interface for the Prompt Types Toolkit module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def _clear_toolkit_state():
+    """
+    on_click callback for the Clear button. Callbacks run before the script reruns, so the
+    widgets are created with the reset values and no extra rerun is needed.
+    """
+    st.session_state["ptt_base_prompt"] = ""
+    st.session_state["ptt_generated_prompt"] = ""
+    st.session_state["ptt_selected_strategy"] = STRATEGY_ZERO_SHOT
+    # Clear specific inputs for strategies if they are in session_state (one pass over the keys)
+    for key in [key for key in st.session_state.keys() if key.startswith(PTT_STRATEGY_INPUT_PREFIXES)]:
+        del st.session_state[key]
+    for widget_key in PTT_MAIN_WIDGET_STATE_KEYS:
+        st.session_state.pop(widget_key, None)
+
+def run():
     """
     Main function to run the Prompt Types Toolkit module's Streamlit UI.
     This function is called by app.py when the 'Prompt Types Toolkit' module is selected.
@@ -156,8 +321,8 @@ def run(api_key_valid: bool):
     # Using radio buttons for single selection of a strategy.
     selected_strategy_key = st.radio(
         "Choose how you want to enhance your prompt:",
-        options=list(PROMPT_STRATEGIES.keys()),
-        index=list(PROMPT_STRATEGIES.keys()).index(st.session_state.get("ptt_selected_strategy", "Zero-shot")),
+        options=PROMPT_STRATEGY_NAMES,
+        index=PROMPT_STRATEGY_INDEX.get(st.session_state.get("ptt_selected_strategy"), 0),
         key="ptt_strategy_radio",
         help="Each strategy applies a different technique to guide the AI."
     )
@@ -168,68 +333,62 @@ def run(api_key_valid: bool):
 
     # 3.3 Dynamic Inputs Based on Selected Strategy
     strategy_specific_inputs = {}
-    if selected_strategy_key == "Few-shot":
+    if selected_strategy_key == STRATEGY_FEW_SHOT:
         st.subheader("📚 Add Few-shot Examples")
         num_examples = st.number_input(
             "Number of Examples:",
-            min_value=1, max_value=5, value=st.session_state.get("ptt_num_examples", 2), step=1,
+            min_value=1, max_value=MAX_FEWSHOT_EXAMPLES, value=2, step=1,
             key="ptt_num_examples"
         )
-        st.session_state["ptt_num_examples"] = num_examples
         examples = []
         for i in range(num_examples):
+            input_key, output_key = PTT_FEWSHOT_INPUT_KEYS[i], PTT_FEWSHOT_OUTPUT_KEYS[i]
             st.markdown(f"**Example {i+1}:**")
-            input_ex = st.text_area(f"Input {i+1}:", key=f"ptt_fewshot_input_{i}", value=st.session_state.get(f"ptt_fewshot_input_{i}", ""), height=50)
-            output_ex = st.text_area(f"Output {i+1}:", key=f"ptt_fewshot_output_{i}", value=st.session_state.get(f"ptt_fewshot_output_{i}", ""), height=50)
+            input_ex = st.text_area(f"Input {i+1}:", key=input_key, height=50)
+            output_ex = st.text_area(f"Output {i+1}:", key=output_key, height=50)
             examples.append({"input": input_ex, "output": output_ex})
-            st.session_state[f"ptt_fewshot_input_{i}"] = input_ex
-            st.session_state[f"ptt_fewshot_output_{i}"] = output_ex
         strategy_specific_inputs["examples"] = examples
 
-    elif selected_strategy_key == "Role-play":
+    elif selected_strategy_key == STRATEGY_ROLE_PLAY:
         st.subheader("🎭 Define the Role")
         role_input = st.text_input(
             "AI's Role (e.g., 'seasoned marketing expert', 'friendly teaching assistant'):",
-            value=st.session_state.get("ptt_role_input", ""),
             placeholder="e.g., 'a customer support agent'",
-            key="ptt_role_input_text"
+            key=_seed_strategy_widget("ptt_role_input_text"),
+            on_change=_persist_strategy_widget, args=("ptt_role_input_text",)
         )
-        st.session_state["ptt_role_input"] = role_input
         strategy_specific_inputs["role"] = role_input
 
-    elif selected_strategy_key == "Constraint-based":
+    elif selected_strategy_key == STRATEGY_CONSTRAINT_BASED:
         st.subheader("🚫 Add Constraints")
         # Allow multiple constraints via text area, separated by newlines
         constraints_text = st.text_area(
             "List each constraint on a new line:",
-            value=st.session_state.get("ptt_constraints_text", "- Max 200 words\n- Use formal language\n- Avoid jargon"),
             height=100,
-            key="ptt_constraints_text_area"
+            key=_seed_strategy_widget("ptt_constraints_text_area"),
+            on_change=_persist_strategy_widget, args=("ptt_constraints_text_area",)
         )
-        st.session_state["ptt_constraints_text"] = constraints_text
-        strategy_specific_inputs["constraints"] = [c.strip() for c in constraints_text.split('\n') if c.strip()]
+        strategy_specific_inputs["constraints"] = [stripped for c in constraints_text.split('\n') if (stripped := c.strip())]
 
-    elif selected_strategy_key == "Persona Embedding":
+    elif selected_strategy_key == STRATEGY_PERSONA:
         st.subheader("👤 Define the Persona")
         persona_desc = st.text_area(
             "Describe the AI's persona (e.g., 'a witty and sarcastic AI who enjoys wordplay'):",
-            value=st.session_state.get("ptt_persona_desc", ""),
             height=100,
             placeholder="e.g., 'a wise and patient mentor'",
-            key="ptt_persona_desc_text"
+            key=_seed_strategy_widget("ptt_persona_desc_text"),
+            on_change=_persist_strategy_widget, args=("ptt_persona_desc_text",)
         )
-        st.session_state["ptt_persona_desc"] = persona_desc
         strategy_specific_inputs["persona_description"] = persona_desc
 
-    elif selected_strategy_key == "System + User + Assistant Format":
+    elif selected_strategy_key == STRATEGY_SYSTEM_FORMAT:
         st.subheader("💬 Define Conversation Roles")
         system_instruction = st.text_area(
             "System Instruction (Overall guidance for the AI throughout the conversation):",
-            value=st.session_state.get("ptt_system_instruction", "You are a helpful and knowledgeable AI assistant."),
             height=100,
-            key="ptt_system_instruction_text"
+            key=_seed_strategy_widget("ptt_system_instruction_text"),
+            on_change=_persist_strategy_widget, args=("ptt_system_instruction_text",)
         )
-        st.session_state["ptt_system_instruction"] = system_instruction
         strategy_specific_inputs["system_instruction"] = system_instruction
 
 
@@ -243,64 +402,42 @@ def run(api_key_valid: bool):
             help="Click to apply the selected strategy to your base prompt."
         )
     with col_clear_btn:
-        clear_button_clicked = st.button(
+        st.button(
             "🗑️ Clear",
             use_container_width=True,
             key="ptt_clear_button",
-            help="Clear all inputs and generated prompt."
+            help="Clear all inputs and generated prompt.",
+            on_click=_clear_toolkit_state
         )
 
-    # Handle the clear button click
-    if clear_button_clicked:
-        st.session_state["ptt_base_prompt"] = ""
-        st.session_state["ptt_generated_prompt"] = ""
-        st.session_state["ptt_selected_strategy"] = "Zero-shot"
-        # Clear specific inputs for strategies if they are in session_state
-        for key_prefix in ["ptt_fewshot_input_", "ptt_fewshot_output_", "ptt_role_input", "ptt_constraints_text", "ptt_persona_desc", "ptt_system_instruction"]:
-            for key in list(st.session_state.keys()):
-                if key.startswith(key_prefix):
-                    del st.session_state[key]
-        if "ptt_num_examples" in st.session_state:
-            del st.session_state["ptt_num_examples"]
-        st.experimental_rerun()
-
-
-    # 3.4 Transformed Prompt Display
+
+    # 3.4 Logic for Generation
+    # Handled before the display area is drawn, so the transformed prompt shows up in this
+    # same run without an extra rerun.
+    if generate_button_clicked:
+        if not base_prompt.strip():
+            st.error("Please enter a base prompt to apply a strategy.")
+            logger.warning("Prompt transformation aborted: Base prompt is empty.")
+            st.session_state["ptt_generated_prompt"] = "Your transformed prompt will appear here."
+        else:
+            logger.info("Applying strategy '%s' to base prompt.", selected_strategy_key)
+            transformed_text = apply_prompt_strategy(base_prompt, selected_strategy_key, **strategy_specific_inputs)
+
+            st.session_state["ptt_generated_prompt"] = transformed_text
+            st.success("Prompt successfully transformed!")
+
+    # 3.5 Transformed Prompt Display
     st.subheader("🚀 Transformed Prompt")
     if "ptt_generated_prompt" not in st.session_state:
         st.session_state["ptt_generated_prompt"] = "Your transformed prompt will appear here."
 
-    transformed_prompt_display = st.text_area(
-        "Copy the strategy-enhanced prompt below:",
-        value=st.session_state["ptt_generated_prompt"],
-        height=350,
-        key="ptt_transformed_prompt_output",
-        disabled=True
-    )
-
     if st.session_state["ptt_generated_prompt"] and st.session_state["ptt_generated_prompt"] != "Your transformed prompt will appear here.":
-        shared_utils.add_copy_to_clipboard_button(st.session_state["ptt_generated_prompt"], shared_utils.MSG_COPY_BUTTON)
+        # The copy block is the display of the transformed prompt.
+        shared_utils.add_copy_to_clipboard_button(st.session_state["ptt_generated_prompt"])
         st.info("The prompt above has been modified based on your selected strategy.")
     else:
+        st.caption("Your transformed prompt will appear here.")
         st.info("Enter your base prompt and select a strategy to see the transformation.")
 
     shared_utils.display_ai_powered_notice()
-
-
-    # 3.5 Logic for Generation
-    if generate_button_clicked:
-        if not base_prompt.strip():
-            st.error("Please enter a base prompt to apply a strategy.")
-            logger.warning("Prompt transformation aborted: Base prompt is empty.")
-            st.session_state["ptt_generated_prompt"] = "Your transformed prompt will appear here."
-            st.experimental_rerun()
-            return
-
-        logger.info(f"Applying strategy '{selected_strategy_key}' to base prompt.")
-        transformed_text = apply_prompt_strategy(base_prompt, selected_strategy_key, **strategy_specific_inputs)
-
-        st.session_state["ptt_generated_prompt"] = transformed_text
-        st.success("Prompt successfully transformed!")
-        st.experimental_rerun() # Rerun to update the display area.
-
     logger.info("Prompt Types Toolkit module UI rendered.")
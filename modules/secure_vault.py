@@ -70,11 +70,14 @@ def conceptual_save_prompt(user_id: str, prompt_data: dict) -> bool:
         if "conceptual_prompts" not in st.session_state:
             st.session_state["conceptual_prompts"] = {}
         if user_id not in st.session_state["conceptual_prompts"]:
-            st.session_state["conceptual_prompts"][user_id] = []
-        
-        # Assign a simple ID for this conceptual prompt.
-        prompt_data["id"] = len(st.session_state["conceptual_prompts"][user_id]) + 1
-        st.session_state["conceptual_prompts"][user_id].append(prompt_data)
+            st.session_state["conceptual_prompts"][user_id] = {"prompts": {}, "next_id": 1}
+
+        # Assign a simple ID for this conceptual prompt. IDs come from a per-user counter rather
+        # than the list length, so they never repeat after a prompt has been deleted.
+        bucket = st.session_state["conceptual_prompts"][user_id]
+        prompt_data["id"] = bucket["next_id"]
+        bucket["next_id"] += 1
+        bucket["prompts"][prompt_data["id"]] = prompt_data # Keyed by ID (insertion-ordered) for O(1) deletes.
         logger.info(f"Conceptual prompt saved for {user_id}: {prompt_data.get('name', 'Unnamed Prompt')}")
         return True
     logger.warning("Conceptual save prompt failed: Missing user_id or prompt_data.")
@@ -86,7 +89,7 @@ def conceptual_load_prompts(user_id: str) -> list:
     """
     if user_id in st.session_state.get("conceptual_prompts", {}):
         logger.info(f"Conceptual prompts loaded for {user_id}.")
-        return st.session_state["conceptual_prompts"][user_id]
+        return list(st.session_state["conceptual_prompts"][user_id]["prompts"].values())
     logger.info(f"No conceptual prompts found for {user_id}.")
     return []
 
@@ -95,7 +98,7 @@ def conceptual_load_prompts(user_id: str) -> list:
 # This section defines the user interface for the Secure Prompt Vault module.
 # ====================================================================================================
 
-def run(api_key_valid: bool):
+def run():
     """
     Main function to run the Secure Prompt Vault module's Streamlit UI.
     This function is called by app.py when the 'Secure Prompt Vault' module is selected.
@@ -109,9 +112,13 @@ def run(api_key_valid: bool):
     st.warning("This module is conceptual. User authentication, storage, and history management features will be fully implemented in future updates. Below is a simulation of user login and prompt saving.")
     st.markdown("---")
 
+    # Login and logout both rerun the script, so the status is fixed for the rest of this run.
+    logged_in = conceptual_user_login_status()
+    current_user_id = st.session_state.get("simulated_user_id", "")
+
     # 3.1 Conceptual User Authentication
     st.subheader("👤 User Account (Simulated)")
-    if not conceptual_user_login_status():
+    if not logged_in:
         with st.form("login_form", clear_on_submit=True):
             st.write("Login to access your Prompt Vault:")
             username_input = st.text_input("Enter a Username (e.g., 'myuser')", key="vault_username_input")
@@ -120,20 +127,19 @@ def run(api_key_valid: bool):
             if login_button:
                 if conceptual_login(username_input):
                     st.success(f"Welcome, {username_input}! You are conceptually logged in.")
-                    st.experimental_rerun() # Rerun to update UI after login
+                    st.rerun() # Rerun to update UI after login
                 else:
                     st.error("Please enter a username.")
     else:
-        current_user_id = st.session_state["simulated_user_id"]
         st.success(f"Currently logged in as: `{current_user_id}`")
         if st.button("🚪 Simulated Logout", key="vault_logout_button"):
             conceptual_logout()
-            st.experimental_rerun() # Rerun to update UI after logout
+            st.rerun() # Rerun to update UI after logout
 
     st.markdown("---")
 
     # 3.2 Conceptual Prompt Saving
-    if conceptual_user_login_status():
+    if logged_in:
         st.subheader("💾 Save a Prompt (Simulated)")
         with st.form("save_prompt_form", clear_on_submit=False):
             prompt_name = st.text_input("Prompt Name:", value=st.session_state.get("sv_prompt_name", ""), key="sv_prompt_name_input")
@@ -151,12 +157,12 @@ def run(api_key_valid: bool):
                         "content": prompt_content,
                         "tags": tags_list
                     }
-                    if conceptual_save_prompt(st.session_state["simulated_user_id"], prompt_data):
+                    if conceptual_save_prompt(current_user_id, prompt_data):
                         st.success(f"Prompt '{prompt_name}' conceptually saved!")
                         st.session_state["sv_prompt_name"] = "" # Clear form
                         st.session_state["sv_prompt_content"] = ""
                         st.session_state["sv_prompt_tags"] = ""
-                        st.experimental_rerun() # Rerun to update saved list
+                        st.rerun() # Rerun to update saved list
                     else:
                         st.error("Failed to conceptually save prompt.")
 
@@ -164,28 +170,26 @@ def run(api_key_valid: bool):
 
         # 3.3 Conceptual Saved Prompts Display
         st.subheader("📚 Your Saved Prompts (Simulated)")
-        current_user_prompts = conceptual_load_prompts(st.session_state["simulated_user_id"])
+        current_user_prompts = conceptual_load_prompts(current_user_id)
 
         if not current_user_prompts:
             st.info("You don't have any prompts saved in the vault yet. Save one above!")
         else:
             for prompt in current_user_prompts:
                 with st.expander(f"**{prompt['name']}** (ID: {prompt['id']})", expanded=False):
-                    st.code(prompt['content'], language='text')
                     st.markdown(f"**Tags:** `{'`, `'.join(prompt['tags'])}`")
                     col_copy_saved, col_delete_saved = st.columns([0.8, 0.2])
                     with col_copy_saved:
-                        shared_utils.add_copy_to_clipboard_button(prompt['content'], f"📋 Copy Saved Prompt {prompt['id']}")
+                        # Renders the prompt content with a copy icon.
+                        shared_utils.add_copy_to_clipboard_button(prompt['content'])
                     with col_delete_saved:
                         # Conceptual delete button (would modify st.session_state["conceptual_prompts"])
                         if st.button("🗑️ Delete (Simulated)", key=f"delete_saved_{prompt['id']}"):
                             st.warning(f"Conceptually deleting prompt '{prompt['name']}'...")
                             # In a real app, this would remove from database
-                            st.session_state["conceptual_prompts"][st.session_state["simulated_user_id"]] = [
-                                p for p in st.session_state["conceptual_prompts"][st.session_state["simulated_user_id"]] if p["id"] != prompt["id"]
-                            ]
+                            st.session_state["conceptual_prompts"][current_user_id]["prompts"].pop(prompt["id"], None)
                             st.success(f"Prompt '{prompt['name']}' conceptually deleted!")
-                            st.experimental_rerun() # Rerun to update list
+                            st.rerun() # Rerun to update list
 
     else:
         st.info("Login above to access your secure prompt vault and history.")
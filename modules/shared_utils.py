@@ -5,6 +5,12 @@
 import streamlit as st
 import google.generativeai as genai
 import logging
+import copy # For copying mutable session-state defaults
+import hashlib # For deriving model cache keys from API keys
+import time # For throttling streamed UI updates
+import sys # For interning static UI messages
+from typing import Final
+from modules import _llm_cache # For the response cache policy names
 
 logger = logging.getLogger(__name__)
 
@@ -35,16 +41,23 @@ GEMINI_SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
 ]
 
-# 1.2 Caching Mechanism for Gemini Model
-# Using Streamlit's @st.cache_resource to cache the initialized model.
-# This prevents re-initializing the model on every Streamlit rerun, improving performance.
-@st.cache_resource(ttl=3600) # Cache for 1 hour. Adjust as needed.
+# 1.2 Streaming Configuration
+# Minimum time between placeholder refreshes while a response streams in (~30 updates/sec).
+# Chunks arriving faster than this are buffered and flushed together.
+STREAM_FLUSH_INTERVAL_SECONDS = 1 / 30
+
+# 1.3 Caching Mechanism for Gemini Model
+# Initialized models are kept in a process-wide dict keyed on (API key digest, model name).
+# This prevents re-initializing the model on every Streamlit rerun without going through
+# Streamlit's cache machinery, and the raw key is never stored as part of a cache key.
+_MODEL_CACHE = {}
+
 def initialize_gemini_model(api_key: str, model_name: str = DEFAULT_GEMINI_MODEL):
     """
     Initializes and configures the Google Gemini GenerativeModel.
 
-    This function is cached to prevent redundant API key configuration and model
-    instantiation on every Streamlit rerun, enhancing application performance.
+    Called by `get_gemini_model` on a cache miss; the result is cached there to prevent
+    redundant API key configuration and model instantiation on every Streamlit rerun.
 
     Args:
         api_key (str): The API key for accessing the Gemini API.
@@ -73,6 +86,29 @@ def initialize_gemini_model(api_key: str, model_name: str = DEFAULT_GEMINI_MODEL
         # It's better to return None here and let the calling function handle the UI error.
         return None
 
+def hash_api_key(api_key: str) -> bytes:
+    """
+    Returns a short, non-reversible digest of an API key for use as a cache key.
+
+    Args:
+        api_key (str): The Gemini API key.
+
+    Returns:
+        bytes: A 16-byte BLAKE2b digest.
+    """
+    return hashlib.blake2b(api_key.encode("utf-8"), digest_size=16).digest()
+
+def get_api_key_digest() -> bytes:
+    """
+    Returns the digest of the current session's API key, which identifies its rate-limit bucket
+    (and other per-key state). Call this from the script thread and pass the result down;
+    worker threads cannot read session state.
+
+    Returns:
+        bytes: `hash_api_key` of the session's Gemini API key.
+    """
+    return hash_api_key(st.session_state.get("gemini_api_key", ""))
+
 def get_gemini_model(api_key: str):
     """
     Retrieves the initialized Gemini model. If not already initialized or if API key changes,
@@ -84,16 +120,73 @@ def get_gemini_model(api_key: str):
     Returns:
         genai.GenerativeModel: The initialized Gemini model, or None if key is invalid.
     """
-    # Use the cached function. Streamlit handles re-running it if `api_key` changes.
-    return initialize_gemini_model(api_key, st.session_state.get("selected_gemini_model", DEFAULT_GEMINI_MODEL))
+    # A different key gives a different digest, so a new model is built for it.
+    cache_key = (hash_api_key(api_key), st.session_state.get("selected_gemini_model", DEFAULT_GEMINI_MODEL))
+    model = _MODEL_CACHE.get(cache_key)
+    if model is None:
+        model = initialize_gemini_model(api_key, cache_key[1])
+        if model is not None: # Failed initializations are retried on the next call.
+            _MODEL_CACHE[cache_key] = model
+    return model
 
-def clear_cached_model():
+def clear_cached_model(api_key: str):
     """
-    Clears the cached Gemini model. Useful when the API key changes or when
-    a fresh initialization is needed.
+    Clears the cached Gemini models built for one API key. Useful when the API key changes or
+    when a fresh initialization is needed. Models cached for other keys (other sessions) are kept.
+
+    Args:
+        api_key (str): The API key whose cached models should be evicted.
     """
-    initialize_gemini_model.clear()
-    logger.info("Cached Gemini model cleared.")
+    api_key_digest = hash_api_key(api_key)
+    for cache_key in [cache_key for cache_key in list(_MODEL_CACHE) if cache_key[0] == api_key_digest]:
+        _MODEL_CACHE.pop(cache_key, None)
+    logger.info("Cached Gemini models for the previous API key cleared.")
+
+# 1.4 Streaming Responses
+def iter_response_text(response):
+    """
+    Yields the text of each chunk of a streamed Gemini response, e.g. for `st.write_stream`.
+
+    Args:
+        response: A streamed response from `generate_content(..., stream=True)` or
+            `send_message(..., stream=True)`.
+
+    Yields:
+        str: The text of each chunk that has text parts.
+    """
+    for chunk in response:
+        try:
+            yield chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g., safety-blocked) have no .text; skip them.
+            continue
+
+def stream_response_to_placeholder(response, placeholder) -> str:
+    """
+    Consumes a streamed Gemini response, buffering chunks and refreshing the placeholder
+    at most once per STREAM_FLUSH_INTERVAL_SECONDS.
+
+    Args:
+        response: A streamed response from `generate_content(..., stream=True)` or
+            `send_message(..., stream=True)`.
+        placeholder: A Streamlit `st.empty()` placeholder to render the partial text into.
+
+    Returns:
+        str: The full response text.
+    """
+    buffer = []
+    last_flush = 0.0
+    for chunk_text in iter_response_text(response):
+        buffer.append(chunk_text)
+        now = time.monotonic()
+        if now - last_flush >= STREAM_FLUSH_INTERVAL_SECONDS:
+            placeholder.markdown("".join(buffer))
+            last_flush = now
+
+    full_text = "".join(buffer)
+    if full_text:
+        placeholder.markdown(full_text) # Final flush so the last buffered chunks are shown.
+    return full_text
 
 
 # ====================================================================================================
@@ -102,57 +195,32 @@ def clear_cached_model():
 # ====================================================================================================
 
 # 2.1 Standard UI Messages
-MSG_API_KEY_MISSING = "Please enter your Gemini API Key in the sidebar to enable AI features."
-MSG_GENERATION_FAILED = "Failed to generate content. Please try again or check your API key/inputs."
-MSG_TASK_MISSING = "Please describe your task or goal in the text area."
-MSG_LOADING_AI = "AI Genius at work... crafting your response!"
-MSG_GENERATE_BUTTON = "🚀 Generate AI Response"
-MSG_COPY_BUTTON = "📋 Copy to Clipboard"
-MSG_COPIED_SUCCESS = "Copied to clipboard!"
-MSG_COPY_FAILED = "Failed to copy to clipboard. Please copy manually."
-MSG_AI_POWERED_NOTICE = "Powered by Google Gemini AI"
+# The UI messages are interned so every module and session passes the same string object.
+MSG_API_KEY_MISSING: Final[str] = sys.intern("Please enter your Gemini API Key in the sidebar to enable AI features.")
+MSG_GENERATION_FAILED: Final[str] = sys.intern("Failed to generate content. Please try again or check your API key/inputs.")
+MSG_TASK_MISSING: Final[str] = sys.intern("Please describe your task or goal in the text area.")
+MSG_LOADING_AI: Final[str] = sys.intern("AI Genius at work... crafting your response!")
+MSG_GENERATE_BUTTON: Final[str] = sys.intern("🚀 Generate AI Response")
+MSG_COPY_HINT: Final[str] = sys.intern("📋 Use the copy icon in the top-right corner of the box below to copy this text.")
+MSG_AI_POWERED_NOTICE: Final[str] = sys.intern("Powered by Google Gemini AI")
 
 
 # 2.2 Reusable UI Function for Copy to Clipboard
-def add_copy_to_clipboard_button(text_to_copy: str, button_label: str = MSG_COPY_BUTTON):
+def add_copy_to_clipboard_button(text_to_copy: str, caption: str = MSG_COPY_HINT):
     """
-    Adds a button that copies a given text to the clipboard using JavaScript.
-    This is a common workaround for Streamlit's lack of a direct clipboard API.
+    Shows the text in a code block, which Streamlit renders with a built-in copy icon.
+    No custom JavaScript or `unsafe_allow_html` is needed, and Streamlit handles the
+    clipboard access and the copied feedback itself. The block is the display of the
+    text, so callers should not render the same text again (e.g. in a read-only text area).
 
     Args:
         text_to_copy (str): The text content to be copied to the user's clipboard.
-        button_label (str): The text label displayed on the copy button.
-    """
-    # Escape backticks in the text to ensure correct JS string literal.
-    escaped_text = text_to_copy.replace('`', '\\`')
-    copy_script = f"""
-        <script>
-            function copyToClipboard(text) {{
-                navigator.clipboard.writeText(text).then(function() {{
-                    // alert("{MSG_COPIED_SUCCESS}"); // Removed alert as per instructions
-                    const copiedSpan = document.getElementById('copied-status');
-                    if (copiedSpan) {{
-                        copiedSpan.textContent = '{MSG_COPIED_SUCCESS}';
-                        setTimeout(() => copiedSpan.textContent = '', 2000);
-                    }}
-                }}, function(err) {{
-                    console.error('Could not copy text: ', err);
-                    // alert("{MSG_COPY_FAILED}"); // Removed alert
-                    const copiedSpan = document.getElementById('copied-status');
-                    if (copiedSpan) {{
-                        copiedSpan.textContent = '{MSG_COPY_FAILED}';
-                        setTimeout(() => copiedSpan.textContent = '', 2000);
-                    }}
-                }});
-            }}
-        </script>
-        <button onclick="copyToClipboard(`{escaped_text}`)">
-            {button_label}
-        </button>
-        <span id="copied-status" style="margin-left: 10px; color: green;"></span>
-    """
-    st.markdown(copy_script, unsafe_allow_html=True)
-    logger.debug("Copy to clipboard button added.")
+        caption (str): Caption shown above the code block.
+    """
+    st.caption(caption)
+    st.code(text_to_copy, language=None)
+    if logger.isEnabledFor(logging.DEBUG): # These helpers run on every rerun.
+        logger.debug("Copy to clipboard button added.")
 
 # 2.3 Initial Help Message for Modules
 def display_module_help(help_text: str):
@@ -163,9 +231,32 @@ def display_module_help(help_text: str):
         help_text (str): The Markdown string containing the help message.
     """
     st.info(help_text)
-    logger.debug("Displayed module help message.")
+    if logger.isEnabledFor(logging.DEBUG): # These helpers run on every rerun.
+        logger.debug("Displayed module help message.")
+
+# 2.4 Function to read the global API key status
+def is_api_key_valid() -> bool:
+    """
+    Reads the global API key status maintained by the sidebar in app.py.
+    Modules call this instead of receiving the status as a `run()` argument.
 
-# 2.4 Function to check API key status and display warning
+    Returns:
+        bool: True if an API key has been entered, False otherwise.
+    """
+    return st.session_state.get("api_key_entered", False)
+
+# 2.5 Function to read the response cache policy
+def get_llm_cache_policy() -> str:
+    """
+    Reads the response cache policy selected in the sidebar in app.py. Call this from the
+    script thread and pass the result down; worker threads cannot read session state.
+
+    Returns:
+        str: One of `_llm_cache.CACHE_POLICIES`.
+    """
+    return st.session_state.get("llm_cache_policy", _llm_cache.POLICY_ENABLED)
+
+# 2.6 Function to check API key status and display warning
 def check_api_key_status(api_key_valid: bool) -> bool:
     """
     Checks the validity of the API key and displays a warning if it's missing.
@@ -177,17 +268,77 @@ def check_api_key_status(api_key_valid: bool) -> bool:
         bool: True if the API key is valid, False otherwise.
     """
     if not api_key_valid:
-        st.warning(MSG_API_KEY_MISSING)
-        logger.warning("API Key not provided or invalid. AI features disabled.")
+        st.warning(MSG_API_KEY_MISSING) # Re-rendered every run; Streamlit drops elements that are not.
+        # Logged once per transition to "missing" instead of on every rerun.
+        run_once_per_session(
+            "api_key_missing_logged",
+            lambda: logger.warning("API Key not provided or invalid. AI features disabled.")
+        )
         return False
+    reset_run_once("api_key_missing_logged")
     return True
 
-# 2.5 Reusable function for displaying AI-powered notice
+# 2.7 Reusable function for displaying AI-powered notice
 def display_ai_powered_notice():
     """
     Displays a small notice indicating the content is AI-powered.
     """
-    st.markdown(f"<p style='font-size:0.8em; color:#777;'>{MSG_AI_POWERED_NOTICE}</p>", unsafe_allow_html=True)
-    logger.debug("Displayed AI powered notice.")
+    st.caption(MSG_AI_POWERED_NOTICE) # Small grey text natively, no HTML to build or sanitize.
+    if logger.isEnabledFor(logging.DEBUG): # These helpers run on every rerun.
+        logger.debug("Displayed AI powered notice.")
+
+
+# ====================================================================================================
+# SECTION 3: SESSION STATE HELPERS
+# Helpers for seeding and managing module state in st.session_state.
+# ====================================================================================================
+
+# 3.1 Seed module defaults in a single pass
+def seed_session_defaults(defaults: dict):
+    """
+    Seeds session state with a module's default values, leaving existing keys untouched.
+    Call once at the top of a module's `run()` so widgets can read `st.session_state[key]`
+    directly instead of repeating `st.session_state.get(key, default)`.
+
+    Args:
+        defaults (dict): Mapping of session-state keys to their default values. Mutable
+            defaults (e.g. lists) are copied so sessions never share the same object.
+    """
+    session_state = st.session_state
+    for key, default_value in defaults.items():
+        if key not in session_state:
+            session_state[key] = copy.copy(default_value)
+
+# 3.2 Session-scoped "done once" guards
+def run_once_per_session(key: str, action) -> bool:
+    """
+    Calls `action()` the first time `key` is seen in this session and does nothing afterwards,
+    tracking every key in one shared set instead of a separate session-state flag per helper.
+
+    Only use this for side effects such as logging. Streamlit removes elements that are not
+    rendered again on a rerun, so UI drawn through this helper disappears after the first run.
+
+    Args:
+        key (str): Identifies the action; see `reset_run_once` to make it run again.
+        action (callable): Called with no arguments.
+
+    Returns:
+        bool: True if `action` was called on this run.
+    """
+    seen = st.session_state.setdefault("_run_once_keys", set())
+    if key in seen:
+        return False
+    action()
+    seen.add(key)
+    return True
+
+def reset_run_once(key: str):
+    """
+    Allows the action guarded by `key` in `run_once_per_session` to run again.
+
+    Args:
+        key (str): The key passed to `run_once_per_session`.
+    """
+    st.session_state.get("_run_once_keys", set()).discard(key)
 
 logger.info("Shared utilities loaded.")